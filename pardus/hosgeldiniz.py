@@ -25,14 +25,17 @@
 
 import gi
 gi.require_version("Gdk", "3.0")
+gi.require_version("GdkPixbuf", "2.0")
 gi.require_version("Gtk", "3.0")
 gi.require_version("Notify", "0.7")
 gi.require_version("WebKit", "3.0")
 
 import apt
+import bisect
 import errno
 import gettext
 import glob
+import html
 import inspect
 import json
 import locale
@@ -40,12 +43,15 @@ import logging
 import os
 import platform
 import random
+import re
 import shutil
 import signal
 import socket
 import subprocess
 import sys
 import tempfile
+import time
+import unicodedata
 import urllib.request
 import webbrowser
 
@@ -57,13 +63,32 @@ from aptdaemon.gtk3widgets import AptErrorDialog, AptConfirmDialog, \
                                   AptProgressDialog
 import aptdaemon.errors
 from aptdaemon.enums import *
-from gi.repository import GLib, Gio, GObject, Gdk, Gtk, Notify, WebKit
+from gi.repository import GLib, Gio, GObject, Gdk, GdkPixbuf, Gtk, Notify, WebKit
 from ctypes import cdll, byref, create_string_buffer
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 from getpass import getuser
 
 # i18n - if no translation is available use the inline strings
-t = gettext.translation("pardusarm hoşgeldiniz", "./locale", fallback=True)
+translations_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locale')
+
+def load_translations(locale_name=None):
+    ''' Catalogues are compiled from po/ by "build-locale-bundles", one per locale.
+        Without a locale name, the user's environment decides. '''
+    languages = [locale_name] if locale_name else None
+    return gettext.translation('pardusarm-hosgeldiniz', translations_dir, languages, fallback=True)
+
+def translations_mtime(locale_name=None):
+    ''' When the catalogue load_translations() uses was built, or 0 if there is none. '''
+    languages = [locale_name] if locale_name else None
+    path = gettext.find('pardusarm-hosgeldiniz', translations_dir, languages)
+    try:
+        return os.path.getmtime(path) if path else 0
+    except OSError:
+        return 0
+
+t = load_translations()
 _ = t.gettext
 
 
@@ -111,17 +136,95 @@ def set_proc_title(name=None):
 
 
 class SimpleApt(object):
-    def __init__(self, packages, action):
-        self._timeout = 100
+    ''' An apt operation performed by aptdaemon. Nothing waits for it to finish:
+        'on_progress(percent, bytes_per_second)' is called as it runs and
+        'on_finished(success)' once it is over. '''
+
+    def __init__(self, packages, action, client=None, on_progress=None, on_finished=None):
         self.packages = packages
         self.action = action
-        self.source_to_update = None
         self.update_cache = False
-        self.loop = GLib.MainLoop()
-        self.client = AptClient()
+        self.client = client or AptClient()
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self._speed = None
+
+        # For the 'commit' action, which can combine several changes in one transaction.
+        self.to_install = []
+        self.to_remove = []
+        self.to_upgrade = []
+        self._sources = []
+        self._update_everything = False
+        self._updates_left = None
+
+    def add_packages(self, action, packages):
+        if action == 'install':
+            self.to_install += packages
+        elif action == 'remove':
+            self.to_remove += packages
+        elif action == 'upgrade':
+            self.to_upgrade += packages
+        self.packages = self.packages + packages
+
+    def request_update(self, source=None):
+        ''' Update the cache before committing. Only the given file in sources.list.d is
+            refreshed, or every source without one. Each source is refreshed once however
+            often it is requested, and nothing else once every source is. '''
+        self.update_cache = True
+        if not source:
+            self._update_everything = True
+        elif not source in self._sources:
+            self._sources.append(source)
+
+    def _sources_to_update(self):
+        ''' A list of sources to refresh in turn. None refreshes all of them. '''
+        if self._update_everything:
+            return [None]
+        return list(self._sources) or [None]
+
+    def start(self):
+        if self.action == 'update':
+            self.do_update()
+        elif self.action == 'commit':
+            if self.update_cache:
+                self.do_update()
+            else:
+                self.do_commit()
+        elif self.action == 'fix-incomplete-install':
+            # Corresponds to: dpkg --configure -a
+            self._run(self.client.fix_incomplete_install(), self.on_finished_fix_incomplete_install)
+        elif self.action == 'fix-broken-depends':
+            # Corresponds to: apt-get --fix-broken install
+            self._run(self.client.fix_broken_depends(), self.on_finished_fix_broken_depends)
+
+    def _run(self, transaction, finished_cb):
+        self._speed = None
+        transaction.connect("finished", finished_cb)
+        transaction.connect("progress-changed", self._progress_cb)
+        transaction.connect("progress-details-changed", self._progress_details_cb)
+
+        dialog = AptProgressDialog(transaction)
+        dialog.run(close_on_finished=True, show_error=True,
+                reply_handler=lambda: True,
+                error_handler=self.on_error,
+                )
+
+    def _progress_cb(self, transaction, progress):
+        # The speed is only given with the details, so the last one known is kept.
+        if self.on_progress:
+            self.on_progress(progress, self._speed)
+
+    def _progress_details_cb(self, transaction, items_done, items_total, bytes_done, bytes_total, speed, eta):
+        self._speed = speed
+        if self.on_progress:
+            self.on_progress(transaction.progress, speed)
+
+    def _done(self, success):
+        if self.on_finished:
+            self.on_finished(success)
 
     def on_error(self, error):
-        dynamicapps.operations_busy = False
+        self._done(False)
         if isinstance(error, aptdaemon.errors.NotAuthorizedError):
             # Silently ignore auth failures
             return
@@ -134,8 +237,7 @@ class SimpleApt(object):
         error_dialog.hide()
 
     def on_finished_fix_incomplete_install(self, transaction, status):
-        dynamicapps.operations_busy = False
-        self.loop.quit()
+        self._done(status == 'exit-success')
         if status == 'exit-success':
             Notify.init(_('Fixing incomplete install succeeded'))
             apt_notify=Notify.Notification.new(_('Successfully fixed an incomplete install.'), _('Fixing the incomplete install was successful.'), 'dialog-information')
@@ -148,8 +250,7 @@ class SimpleApt(object):
             return False
 
     def on_finished_fix_broken_depends(self, transaction, status):
-        dynamicapps.operations_busy = False
-        self.loop.quit()
+        self._done(status == 'exit-success')
         if status == 'exit-success':
             Notify.init(_('Fixing broken dependencies succeeded'))
             apt_notify=Notify.Notification.new(_('Successfully fixed broken dependencies.'), _('Fixing the broken dependencies was successful.'), 'dialog-information')
@@ -162,207 +263,338 @@ class SimpleApt(object):
             return False
 
     def on_finished_update(self, transaction, status):
-        dynamicapps.operations_busy = False
         # If the action is only to update do not display notifcations
         if self.action == 'update':
-            self.loop.quit()
-            if status == 'exit-success':
-                return True
-            else:
-                return False
-        elif self.action == 'install':
-            if status != 'exit-success':
-                self.do_notify(status)
-                self.loop.quit()
-                return False
-
-            GLib.timeout_add(self._timeout,self.do_install)
-            return True
-        elif self.action == 'upgrade':
-            if status != 'exit-success':
-                self.do_notify(status)
-                self.loop.quit()
-                return False
-
-            GLib.timeout_add(self._timeout,self.do_upgrade)
-            return True
+            self._done(status == 'exit-success')
+            return status == 'exit-success'
 
-    def on_finished_install(self, transaction, status):
-        dynamicapps.operations_busy = False
-        self.loop.quit()
         if status != 'exit-success':
-            return False
-        else:
             self.do_notify(status)
-
-    def on_finished_remove(self, transaction, status):
-        dynamicapps.operations_busy = False
-        self.loop.quit()
-        if status != 'exit-success':
+            self._done(False)
             return False
-        else:
-            self.do_notify(status)
 
-    def on_finished_upgrade(self, transaction, status):
-        dynamicapps.operations_busy = False
-        self.loop.quit()
-        if status != 'exit-success':
-            return False
+        # Refresh the next new source, if any, before committing.
+        if self._updates_left:
+            self.do_update()
         else:
-            self.do_notify(status)
+            self.do_commit()
+        return True
+
+    def on_finished_commit(self, transaction, status):
+        self.do_notify(status)
+        self._done(status == 'exit-success')
+        return status == 'exit-success'
 
     def do_notify(self, status):
         print('Status: ' + status)
-        if self.action == 'install':
+        title = _('Software changes')
+        noun = _('Changes to ')
+        action = _('changed.')
+
+        # Name the change when the whole batch is of one kind.
+        if not self.to_remove and not self.to_upgrade:
             title = _('Install')
             noun = _('Installation of ')
             action = _('installed.')
-        elif self.action == 'remove':
+        elif not self.to_install and not self.to_upgrade:
             title = _('Remove')
             noun = _('Removal of ')
             action = _('removed.')
-        elif self.action == 'upgrade':
+        elif not self.to_install and not self.to_remove:
             title = _('Upgrade')
             noun = _('Upgrade of ')
             action = _('upgraded.')
 
-        # Do not show notifications when updating the cache
-        if self.action != 'update':
-            if status == 'exit-success':
-                Notify.init(title + ' ' + _('complete'))
-                apt_notify=Notify.Notification.new(title + ' ' + _('complete'), ', '.join(self.packages) + ' ' + _('has been successfully ') +action, 'dialog-information')
-            elif status == 'exit-cancelled':
-                Notify.init(title + ' ' + _('cancelled'))
-                apt_notify=Notify.Notification.new(title + ' ' + _('cancelled'), noun + ', '.join(self.packages) + ' ' + _('was cancelled.'), 'dialog-information')
-            else:
-                Notify.init(title + ' ' + _('failed'))
-                apt_notify=Notify.Notification.new(title + ' ' + _('failed'), noun + ', '.join(self.packages) + ' ' + _('failed.'), 'dialog-error')
-
-            apt_notify.show()
-
-    def do_fix_incomplete_install(self):
-        dynamicapps.operations_busy = True
-        # Corresponds to: dpkg --configure -a
-        apt_fix_incomplete = self.client.fix_incomplete_install()
-        apt_fix_incomplete.connect("finished",self.on_finished_fix_incomplete_install)
-
-        fix_incomplete_dialog = AptProgressDialog(apt_fix_incomplete)
-        fix_incomplete_dialog.run(close_on_finished=True, show_error=True,
-                reply_handler=lambda: True,
-                error_handler=self.on_error,
-                )
-        return False
-        dynamicapps.operations_busy = False
-
-    def do_fix_broken_depends(self):
-        dynamicapps.operations_busy = True
-        # Corresponds to: apt-get --fix-broken install
-        apt_fix_broken = self.client.fix_broken_depends()
-        apt_fix_broken.connect("finished",self.on_finished_fix_broken_depends)
+        if status == 'exit-success':
+            Notify.init(title + ' ' + _('complete'))
+            apt_notify=Notify.Notification.new(title + ' ' + _('complete'), ', '.join(self.packages) + ' ' + _('has been successfully ') +action, 'dialog-information')
+        elif status == 'exit-cancelled':
+            Notify.init(title + ' ' + _('cancelled'))
+            apt_notify=Notify.Notification.new(title + ' ' + _('cancelled'), noun + ', '.join(self.packages) + ' ' + _('was cancelled.'), 'dialog-information')
+        else:
+            Notify.init(title + ' ' + _('failed'))
+            apt_notify=Notify.Notification.new(title + ' ' + _('failed'), noun + ', '.join(self.packages) + ' ' + _('failed.'), 'dialog-error')
 
-        fix_broken_dialog = AptProgressDialog(apt_fix_broken)
-        fix_broken_dialog.run(close_on_finished=True, show_error=True,
-                reply_handler=lambda: True,
-                error_handler=self.on_error,
-                )
-        return False
-        dynamicapps.operations_busy = False
+        apt_notify.show()
 
     def do_update(self):
-        if self.source_to_update:
-            apt_update = self.client.update_cache(self.source_to_update)
+        if self._updates_left is None:
+            self._updates_left = self._sources_to_update()
+        source = self._updates_left.pop(0)
+        if source:
+            arg.print_verbose('Apt', 'Refreshing source: ' + source)
+            apt_update = self.client.update_cache(source)
         else:
+            arg.print_verbose('Apt', 'Refreshing all sources.')
             apt_update = self.client.update_cache()
-        apt_update.connect("finished",self.on_finished_update)
+        self._run(apt_update, self.on_finished_update)
+
+    def do_commit(self):
+        ''' Installs, removes and upgrades everything added, as a single transaction. '''
+        apt_commit = self.client.commit_packages(self.to_install, [], self.to_remove, [], self.to_upgrade, [])
+        self._run(apt_commit, self.on_finished_commit)
+
+def run_maintenance(action, webkit):
+    ''' Updates the sources or repairs packages, then reloads the page. '''
+    def finished(success):
+        # Applications may still be changing in the Boutique.
+        if not dynamicapps.queue.running:
+            dynamicapps.operations_busy = False
+        aptcache.refresh()
+        webkit._push_config()
+
+    dynamicapps.operations_busy = True
+    SimpleApt([], action, on_finished=finished).start()
+
+class SoftwareQueue(object):
+    ''' Collects applications to install, remove or upgrade, so that changes
+        clicked within 'delay' ms of each other (or while a batch is running)
+        are applied together: one cache update and one apt transaction.
+
+        'client_factory' creates the AptClient for each batch. An application's
+        'on_finished(success)' is called once its batch is over. '''
+
+    def __init__(self, client_factory=AptClient, delay=1500):
+        self.client_factory = client_factory
+        self.delay = delay
+        self.pending = []
+        self.status = {}
+        self.running = False
+        self.webkit = None
+        self._batch = []
+        self._callbacks = {}
+        self._start_source = None
+
+    def add(self, webkit, action, program_id, on_finished=None):
+        if on_finished:
+            self._callbacks.setdefault(program_id, []).append(on_finished)
+        if program_id in self.status:
+            arg.print_verbose('Apps', 'Already queued: ' + program_id)
+            return
 
-        update_dialog = AptProgressDialog(apt_update)
-        update_dialog.run(close_on_finished=True, show_error=True,
-                reply_handler=lambda: True,
-                error_handler=self.on_error,
-                )
-        return False
+        self.webkit = webkit
+        self.pending.append((action, program_id))
+        self.set_status(program_id, _("Waiting..."))
+        dynamicapps.operations_busy = True
 
-    def do_install(self):
-        apt_install = self.client.install_packages(self.packages)
-        apt_install.connect("finished", self.on_finished_install)
+        if not self.running and not self._start_source:
+            self._start_source = GLib.timeout_add(self.delay, self._run_batch)
 
-        install_dialog = AptProgressDialog(apt_install)
-        install_dialog.run(close_on_finished=True, show_error=True,
-                        reply_handler=lambda: True,
-                        error_handler=self.on_error,
-                        )
+    def set_status(self, program_id, text, page=None):
+        ''' Show what is happening to an application on its card.
+            If a PageState is given, changes are queued on it instead. '''
+        self.status[program_id] = text
+        dynamicapps.shown_state.pop(program_id, None)
+        css_class = program_id.replace('.','-')
+        apply_now = page is None
+        if apply_now:
+            page = PageState()
+        page.show('.' + css_class + '-applying')
+        page.hide('.' + css_class + '-launch')
+        page.hide('.' + css_class + '-install')
+        page.hide('.' + css_class + '-reinstall')
+        page.hide('.' + css_class + '-remove')
+        page.hide('.' + css_class + '-upgrade')
+        page.jq('.' + css_class + '-text', 'css', 'color', '#000')
+        page.html('.' + css_class + '-applying-status', text)
+        if apply_now:
+            page.apply(self.webkit)
+
+    # Text to display when applying changes.
+    def _action_text(self, action):
+        return {
+            'install': _("Installing..."),
+            'remove': _("Removing..."),
+            'upgrade': _("Upgrading..."),
+        }.get(action)
+
+    def _run_batch(self):
+        self._start_source = None
+        self.running = True
+        batch, self.pending = self.pending, []
+        try:
+            self._start_batch(batch)
+        except Exception as err:
+            self._abort(batch, err)
         return False
 
-    def do_remove(self):
-        apt_remove = self.client.remove_packages(self.packages)
-        apt_remove.connect("finished", self.on_finished_remove)
+    def _abort(self, batch, err):
+        ''' Gives up on the applications of a batch that are not finished yet,
+            so the queue (and closing Welcome) is never left waiting for them. '''
+        print('[Apps] ERROR: Failed to apply changes: ' + str(err))
+        self._batch = [(action, program_id) for action, program_id in batch if program_id in self.status]
+        self._finished(False)
+
+    def _start_batch(self, batch):
+        print('[Apps] Applying changes to ' + str(len(batch)) + ' application(s).')
+
+        transaction = SimpleApt([], 'commit', self.client_factory(),
+                                on_progress=self._progress, on_finished=self._finished)
+        self._batch = []
+        prepared = []
+        page = PageState()
+        for action, program_id in batch:
+            if not self._action_text(action):
+                print('[Apps] An unknown action was requested.')
+            else:
+                preparation = preinstallation.prepare_packages(program_id, action)
+                if preparation is not None:
+                    self._batch.append((action, program_id))
+                    prepared.append((action, program_id) + preparation)
+                    self.set_status(program_id, self._action_text(action), page)
+                    continue
+            self._done(program_id, False, page)
+        page.apply(self.webkit)
 
-        remove_dialog = AptProgressDialog(apt_remove)
-        remove_dialog.run(close_on_finished=True, show_error=True,
-                        reply_handler=lambda: True,
-                        error_handler=self.on_error,
-                        )
-        return False
+        if not self._batch:
+            self._finished(False)
+        elif arg.simulate_software_changes:
+            print('[Pre-Install] Simulation flag active. No changes will be performed.')
+            self._finished(False)
+        else:
+            def tasks_finished(failed):
+                # Without their new repositories, packages could come from the wrong place.
+                page = PageState()
+                for action, program_id, packages, tasks, updates in prepared:
+                    if program_id in failed:
+                        print('[Pre-Install] Pre-configuration failed for "' + program_id + '". It will not be changed.')
+                        self._batch.remove((action, program_id))
+                        self._done(program_id, False, page)
+                        continue
+                    for source in updates:
+                        transaction.request_update(source)
+                    transaction.add_packages(action, packages)
+                page.apply(self.webkit)
+
+                if not self._batch:
+                    self._finished(False)
+                    return
+                try:
+                    transaction.start()
+                except Exception as err:
+                    self._abort(batch, err)
+                return False
+            groups = [(program_id, tasks) for action, program_id, packages, tasks, updates in prepared if tasks]
+            preinstallation.run_tasks(groups, tasks_finished)
+
+    def _progress(self, percent, speed):
+        details = ' ' + str(percent) + '%'
+        if speed:
+            details += ' (' + str(round(speed / 1000)) + ' kB/s)'
+        page = PageState()
+        for action, program_id in self._batch:
+            self.set_status(program_id, self._action_text(action) + details, page)
+        page.apply(self.webkit)
+
+    def _done(self, program_id, success, page):
+        del self.status[program_id]
+        dynamicapps.update_app_status(self.webkit, program_id, page)
+        for callback in self._callbacks.pop(program_id, []):
+            callback(success)
+
+    def _finished(self, success):
+        # Refresh the page to reflect changes (if any).
+        aptcache.refresh()
+        page = PageState()
+        for action, program_id in self._batch:
+            self._done(program_id, success, page)
+        page.apply(self.webkit)
+        self._batch = []
+
+        # Anything clicked in the meantime forms the next batch.
+        self.running = False
+        if self.pending:
+            self._start_source = GLib.timeout_add(self.delay, self._run_batch)
+        else:
+            dynamicapps.operations_busy = False
 
-    def do_upgrade(self):
-        apt_upgrade = self.client.upgrade_system(True)
-        apt_upgrade.connect("finished", self.on_finished_upgrade)
 
-        upgrade_dialog = AptProgressDialog(apt_upgrade)
-        upgrade_dialog.run(close_on_finished=True, show_error=True,
-                        reply_handler=lambda: True,
-                        error_handler=self.on_error,
-                        )
-        return False
+class SharedAptCache(object):
+    ''' One apt cache for the whole application. It is opened on first use
+        and only re-read when the dpkg status or the package lists change. '''
 
-    def install_packages(self):
-        dynamicapps.operations_busy = True
-        if self.update_cache:
-            GLib.timeout_add(self._timeout,self.do_update)
-        else:
-            GLib.timeout_add(self._timeout,self.do_install)
-        self.loop.run()
-        dynamicapps.operations_busy = False
+    def __init__(self):
+        self._cache = None
+        self._stamp = None
+        self._watched = [os.path.join('/', 'var', 'lib', 'dpkg', 'status'),
+                         os.path.join('/', 'var', 'lib', 'apt', 'lists')]
+
+    def _get_stamp(self):
+        stamp = []
+        for path in self._watched:
+            try:
+                stamp.append(os.stat(path).st_mtime)
+            except OSError:
+                stamp.append(None)
+        return stamp
 
-    def remove_packages(self):
-        dynamicapps.operations_busy = True
-        GLib.timeout_add(self._timeout,self.do_remove)
-        self.loop.run()
-        dynamicapps.operations_busy = False
+    @property
+    def cache(self):
+        if self._cache is None:
+            arg.print_verbose('Apt', 'Opening the package cache...')
+            self._stamp = self._get_stamp()
+            self._cache = apt.Cache()
+        return self._cache
+
+    def refresh(self):
+        ''' Re-read the existing cache object if packages have changed. '''
+        if self._cache is None:
+            # Not opened yet, so it will be up-to-date when first used.
+            return
 
-    def upgrade_packages(self):
-        dynamicapps.operations_busy = True
-        if self.update_cache:
-            GLib.timeout_add(self._timeout,self.do_update)
-        else:
-            GLib.timeout_add(self._timeout,self.do_upgrade)
-        self.loop.run()
-        dynamicapps.operations_busy = False
+        stamp = self._get_stamp()
+        if stamp == self._stamp:
+            arg.print_verbose('Apt', 'Package cache is up-to-date.')
+            return
 
-    def fix_incomplete_install(self):
-        dynamicapps.operations_busy = True
-        GLib.timeout_add(self._timeout,self.do_fix_incomplete_install)
-        self.loop.run()
-        dynamicapps.operations_busy = False
+        arg.print_verbose('Apt', 'Packages changed. Refreshing the package cache...')
+        self._stamp = stamp
+        self._cache.open()
 
-    def fix_broken_depends(self):
-        dynamicapps.operations_busy = True
-        GLib.timeout_add(self._timeout,self.do_fix_broken_depends)
-        self.loop.run()
-        dynamicapps.operations_busy = False
+class DpkgStatus(object):
+    ''' Which packages are installed, read directly from the dpkg status file.
+        This is much lighter than opening an apt cache just to answer
+        "is this package installed?", and is re-read when the file changes. '''
 
-def update_repos():
-    transaction = SimpleApt('', 'update')
-    transaction.update_cache = True
-    transaction.do_update()
+    # Package states where dpkg has no installed version.
+    _not_installed = ['not-installed', 'config-files']
 
-def fix_incomplete_install():
-    transaction = SimpleApt('', 'fix-incomplete-install')
-    transaction.fix_incomplete_install()
+    def __init__(self, path='/var/lib/dpkg/status'):
+        self.path = path
+        self._installed = set()
+        self._mtime = None
+
+    def refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            print('[Apps] WARNING: Cannot read the dpkg status file: ' + self.path)
+            self._installed = set()
+            self._mtime = None
+            return
+
+        if mtime == self._mtime:
+            return
 
-def fix_broken_depends():
-    transaction = SimpleApt('', 'fix-broken-depends')
-    transaction.fix_broken_depends()
+        installed = set()
+        package = None
+        with open(self.path, encoding='utf-8', errors='replace') as status_file:
+            for line in status_file:
+                # Only the "Package:" and "Status:" fields of each stanza are needed.
+                if line.startswith('Package:'):
+                    package = line[8:].strip()
+                elif line.startswith('Status:') and package:
+                    if line.split()[-1] not in self._not_installed:
+                        installed.add(package)
+                    package = None
+
+        arg.print_verbose('Apps', 'Read ' + str(len(installed)) + ' installed packages from ' + self.path)
+        self._installed = installed
+        self._mtime = mtime
+
+    def is_installed(self, package):
+        self.refresh()
+        return package in self._installed
 
 def mkdir_p(path):
     try:
@@ -373,6 +605,113 @@ def mkdir_p(path):
         else:
             raise
 
+def get_cache_dir():
+    ''' Directory for data that can be regenerated at any time. '''
+    cache_dir = os.path.join(GLib.get_user_cache_dir(), 'ubuntu-mate', 'welcome')
+    mkdir_p(cache_dir)
+    return cache_dir
+
+class JsonCache(object):
+    ''' A JSON file under the cache directory that is only valid for a given key.
+        Keys should be lists, as that is how they come back from JSON. '''
+
+    def __init__(self, filename, directory=None):
+        if not directory:
+            directory = get_cache_dir()
+        self.path = os.path.join(directory, filename)
+
+    def load(self, key):
+        try:
+            with open(self.path) as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get('key') != key:
+            arg.print_verbose('Cache', 'Stale: ' + self.path)
+            return None
+        return cached.get('data')
+
+    def save(self, key, data):
+        # Write to a temporary file first so a partial write is never read back.
+        try:
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as cache_file:
+                json.dump({'key': key, 'data': data}, cache_file)
+            os.replace(temp_path, self.path)
+        except OSError as err:
+            print('[Cache] Failed to write ' + self.path + ': ' + str(err))
+
+class Thumbnails(object):
+    ''' Scaled down copies of images under the cache directory. Each copy is named
+        after its source, target height and the source's mtime, so changing either
+        simply makes a new copy. Copies are made one at a time on a worker thread. '''
+
+    def __init__(self, directory=None):
+        if not directory:
+            directory = os.path.join(get_cache_dir(), 'thumbnails')
+        self.directory = directory
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._waiting = {}
+
+    def get(self, source, height, callback):
+        ''' Returns the path of a copy of source no taller than height if there is one.
+            Otherwise returns None, and 'callback(path)' is called on the main loop once
+            it is made, with source itself if a copy could not be made. '''
+        try:
+            mtime = os.stat(source).st_mtime_ns
+        except OSError:
+            return source
+
+        prefix = os.path.splitext(os.path.basename(source))[0] + '-' + str(height) + '-'
+        path = os.path.join(self.directory, prefix + str(mtime) + '.jpg')
+        if os.path.exists(path):
+            return path
+
+        # The same copy may be asked for again before it is ready.
+        if path in self._waiting:
+            self._waiting[path].append(callback)
+            return None
+        self._waiting[path] = [callback]
+
+        def made(result):
+            for waiting_callback in self._waiting.pop(path, []):
+                waiting_callback(result)
+            return False
+
+        def make():
+            # Whatever happens, those waiting are answered so the copy can be asked for again.
+            result = source
+            try:
+                result = self._make(source, height, path, prefix)
+            except Exception as err:
+                print('[Thumbnails] Failed to scale ' + source + ': ' + str(err))
+            finally:
+                GLib.idle_add(made, result)
+        self._executor.submit(make)
+        return None
+
+    def _make(self, source, height, path, prefix):
+        try:
+            mkdir_p(self.directory)
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(source, -1, height, True)
+            temp_path = path + '.tmp'
+            pixbuf.savev(temp_path, 'jpeg', ['quality'], ['90'])
+            os.replace(temp_path, path)
+        except (GLib.Error, OSError) as err:
+            print('[Thumbnails] Failed to scale ' + source + ': ' + str(err))
+            return source
+        arg.print_verbose('Thumbnails', 'Created ' + path)
+
+        # Copies of an older version of the image are no longer needed.
+        for old_path in glob.glob(os.path.join(self.directory, glob.escape(prefix) + '*.jpg')):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        return path
+
 def get_aacs_db():
     home_dir = GLib.get_home_dir()
     key_url = 'http://www.labdv.com/aacs/KEYDB.cfg'
@@ -406,68 +745,64 @@ class PreInstallation(object):
         self.codename = platform.dist()[2]
         arg.print_verbose("Pre-Install", "System is running Ubuntu " + self.os_version + " (" + self.codename + ")")
 
-    def process_packages(self, program_id, action):
+    def prepare_packages(self, program_id, action):
+        ''' Works out what is needed to install, remove or upgrade an application.
+            Returns (packages, tasks, updates), or None if this failed: 'tasks' are
+            privileged steps for run_tasks and 'updates' are sources to refresh.
+            Placeholders in the steps are replaced by the repository installer. '''
         simulating = arg.simulate_software_changes
         print(' ')
 
-        # Get category for this program, which can be used to retrieve data later.
-        category = dynamicapps.get_attribute_for_app(program_id, 'category')
+        # Get the parsed record for this program, which can be used to retrieve data later.
+        record = dynamicapps.apps.get(program_id)
+        if not record:
+            print('[Apps] ERROR: Unknown application "' + program_id + '".')
+            return
 
-        try:
-            preconfig = dynamicapps.index[category][program_id]['pre-install']
-        except:
+        if not record.pre_install:
             print('[Pre-Install] Missing pre-configuration data for "' + program_id + '". Refusing to continue.')
             return
 
-        try:
-            if action == 'install':
-                packages = dynamicapps.index[category][program_id]['install-packages']
-                print('[Apps] Packages to be installed:\n               ' + packages)
-            elif action == 'remove':
-                packages = dynamicapps.index[category][program_id]['remove-packages']
-                print('[Apps] Packages to be removed:\n               ' + packages)
-            elif action == 'upgrade':
-                packages = dynamicapps.index[category][program_id]['upgrade-packages']
-                print('[Apps] Packages to be upgraded:\n               ' + packages)
-            else:
-                print('[Apps] ERROR: Invalid action was requested.')
-                return
-        except:
-            print('[Apps] ERROR: No packages retrieved for requested action.')
+        if action == 'install':
+            print('[Apps] Packages to be installed:')
+        elif action == 'remove':
+            print('[Apps] Packages to be removed:')
+        elif action == 'upgrade':
+            print('[Apps] Packages to be upgraded:')
+        else:
+            print('[Apps] ERROR: Invalid action was requested.')
             return
+        packages = list(record.get_packages(action))
+        print('               ' + ','.join(packages))
 
         # Validate that we have packages to work with.
-        if len(packages):
-            packages = packages.split(',')
-        else:
+        if not packages:
             print('[Apps] ERROR: No package(s) supplied for "' + program_id + '".')
             return
-        transaction = SimpleApt(packages, action)
 
-        # Function to run privileged commands.
-        def run_task(function):
-            subprocess.call(['pkexec', '/usr/lib/ubuntu-mate/ubuntu-mate-welcome-repository-installer', os.path.abspath(os.path.join(app._data_path, 'js/applications.json')), function, category, program_id, target])
+        # Privileged commands and sources to refresh are collected, then run together with
+        # the rest of the batch.
+        tasks = []
+        updates = []
+        def run_task(function, *args):
+            tasks.append([function] + list(args))
+
+        def request_update(source=None):
+            updates.append(source)
 
         # Determine if any pre-configuration is specific to a codename.
-        try:
-            preinstall = dynamicapps.index[category][program_id]['pre-install']
-            codenames = list(preinstall.keys())
-        except:
-            print('[Pre-Install] No pre-install data specified for "' + program_id + '". This application entry is invalid.')
-            return
-        arg.print_verbose('Pre-Install','Available configurations: ' + str(codenames))
-        target = None
-        for name in codenames:
-            if name == self.codename:
-                target = name
-                break
-        if not target:
-                target = 'all'
-                arg.print_verbose('Pre-Install','Using "all" pre-configuration.')
+        preinstall = record.pre_install
+        arg.print_verbose('Pre-Install','Available configurations: ' + str(list(preinstall.keys())))
+        target = record.get_target(self.codename)
+        if target == 'all':
+            arg.print_verbose('Pre-Install','Using "all" pre-configuration.')
         else:
             arg.print_verbose('Pre-Install','Using configuration for: "' + target + '".')
 
-        methods = preinstall[target]['method'].split('+')
+        if not target in record.methods:
+            print('[Pre-Install] No pre-install data specified for "' + program_id + '". This application entry is invalid.')
+            return
+        methods = record.methods[target]
         if not methods:
             print('[Pre-Install] No pre-install method was specified. The index is invalid.')
         else:
@@ -484,7 +819,7 @@ class PreInstallation(object):
                     print('[Pre-Install] Enabling the Ubuntu partner repository.')
                     if not simulating:
                         run_task('enable_partner_repository')
-                        transaction.update_cache = True
+                        request_update()
 
                 elif method == 'ppa':
                     try:
@@ -494,15 +829,16 @@ class PreInstallation(object):
                         return
                     print('[Pre-Install] Adding PPA: "' + ppa + '" and updating cache.')
                     if not simulating:
-                        run_task('enable_ppa')
-                        transaction.update_cache = True
+                        run_task('enable_ppa', ppa)
                     try:
                         source_file = preinstall[target]['source-file'].replace('OSVERSION',self.os_version).replace('CODENAME',self.codename)
                         print('[Pre-Install] Updating Apt Source: "' + source_file + '.list"')
                         if not simulating:
-                            transaction.source_to_update = source_file + '.list'
+                            request_update(source_file + '.list')
                     except:
                         arg.print_verbose('Pre-Install','Updating entire cache as no source file was specified.')
+                        if not simulating:
+                            request_update()
 
                 elif method == 'manual':
                     # Do we get the apt key from a URL?
@@ -510,7 +846,7 @@ class PreInstallation(object):
                         apt_key_url = preinstall[target]['apt-key-url']
                         print('[Pre-Install] Getting Apt key from URL: "' + apt_key_url + '"')
                         if not simulating:
-                            run_task('add_apt_key_from_url')
+                            run_task('add_apt_key_from_url', apt_key_url)
                     except:
                         arg.print_verbose('Pre-Install', 'No apt key to retrieve from a URL.')
 
@@ -520,7 +856,7 @@ class PreInstallation(object):
                         apt_key_key =    preinstall[target]['apt-key-server'][1]
                         print('[Pre-Install] Getting key "' + apt_key_key + '" from keyserver: "' + apt_key_server + '"')
                         if not simulating:
-                            run_task('add_apt_key_from_keyserver')
+                            run_task('add_apt_key_from_keyserver', apt_key_server, apt_key_key)
                     except:
                         arg.print_verbose('Pre-Install', 'No apt key to retrieve from a key server.')
 
@@ -536,9 +872,8 @@ class PreInstallation(object):
                         try:
                             print('[Pre-Install] Updating Apt Source: ' + source_file + '.list')
                             if not simulating:
-                                run_task('add_apt_sources')
-                                transaction.source_to_update = source_file + '.list'
-                                transaction.update_cache = True
+                                run_task('add_apt_sources', source, preinstall[target]['source-file'])
+                                request_update(source_file + '.list')
                         except:
                             arg.print_verbose('Pre-Install','Failed to add apt sources!')
                     except:
@@ -551,22 +886,48 @@ class PreInstallation(object):
                 if simulating:
                     print('[Simulation] Deleting Apt Source: ' + listname)
                 else:
-                    run_task('del_apt_sources')
+                    run_task('del_apt_sources', preinstall[target]['source-file'])
             except:
                 print('[Pre-Install]', 'No apt source specified, so none will be removed.')
 
 
-        # Pre-configuration complete. Now perform the operations, unless this was just a simulation.
-        if simulating:
-            print('[Pre-Install] Simulation flag active. No changes will be performed.')
+        # Pre-configuration complete. The packages are changed together with the rest of the batch.
+        return (packages, tasks, updates)
+
+
+    def run_tasks(self, groups, on_finished):
+        ''' Runs privileged pre-configuration for a whole batch in one authenticated session.
+            'groups' are (program_id, tasks) pairs, and 'on_finished(failed)' is called with
+            the program IDs whose tasks failed. The repository installer reads the tasks as
+            JSON from its standard input, and reports which groups failed on the last line. '''
+        if not groups:
+            on_finished(set())
             return
-        else:
-            if transaction.action == 'install':
-                transaction.install_packages()
-            elif transaction.action == 'remove':
-                transaction.remove_packages()
-            elif transaction.action == 'upgrade':
-                transaction.upgrade_packages()
+        arg.print_verbose('Pre-Install', 'Running privileged tasks for ' + str(len(groups)) + ' application(s).')
+        program_ids = [program_id for program_id, tasks in groups]
+        plan = json.dumps([tasks for program_id, tasks in groups]).encode('utf-8')
+
+        def run():
+            # Without a report (eg. authentication was cancelled), every group failed.
+            failed = set(program_ids)
+            try:
+                helper = subprocess.Popen(['pkexec', '/usr/lib/ubuntu-mate/ubuntu-mate-welcome-repository-installer', '--plan'],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                output = helper.communicate(plan)[0].decode('utf-8', 'replace')
+            except OSError as err:
+                print('[Pre-Install] Failed to run the repository installer: ' + str(err))
+                output = ''
+            for line in output.splitlines():
+                if line.startswith('Failed groups: '):
+                    try:
+                        failed = set(program_ids[number] for number in json.loads(line[15:]))
+                    except (ValueError, IndexError, TypeError):
+                        pass
+                else:
+                    print(line)
+            GLib.idle_add(on_finished, failed)
+
+        Thread(target=run, daemon=True).start()
 
 
 class WelcomeConfig(object):
@@ -627,22 +988,193 @@ class WelcomeConfig(object):
         self._autostart = os.path.exists(self._autostart_path)
 
 
+class PageState(object):
+    ''' Collects changes for the current page so they can be applied
+        with a single script call instead of one call per element. '''
+
+    def __init__(self):
+        self.actions = []
+
+    def jq(self, selector, method, *args):
+        ''' Queue a jQuery method call, eg. jq('#install', 'show') '''
+        self.actions.append(['$', selector, method, list(args)])
+
+    def show(self, selector):
+        self.jq(selector, 'show')
+
+    def hide(self, selector):
+        self.jq(selector, 'hide')
+
+    def visible(self, selector, state):
+        ''' Show the element if 'state' is true, otherwise hide it. '''
+        if state:
+            self.show(selector)
+        else:
+            self.hide(selector)
+
+    def html(self, selector, content):
+        self.jq(selector, 'html', content)
+
+    def append(self, selector, content):
+        self.jq(selector, 'append', content)
+
+    def set_var(self, name, value):
+        ''' Set a global JavaScript variable on the page. '''
+        self.actions.append(['var', name, value])
+
+    def call(self, function, *args):
+        ''' Call a global JavaScript function on the page. '''
+        self.actions.append(['call', function, list(args)])
+
+    def to_script(self):
+        return 'applyPageState(' + json.dumps(self.actions) + ');'
+
+    def apply(self, webkit):
+        ''' Send all queued changes to the page in one go. '''
+        if self.actions:
+            webkit.execute_script(self.to_script())
+            self.actions = []
+
+
+class SlideTranslations(object):
+    ''' Finds the translated version of each slide for a locale.
+
+        Nothing is read until the first lookup. The slides that have a translation
+        are then listed once and kept in a manifest, which is only rebuilt when
+        either directory changes. '''
+
+    def __init__(self, locale_name, location, data_path):
+        self.locale_name = locale_name
+        self.location = location
+        self.data_path = data_path
+        self._manifest = None
+
+    def _find_locale_dir(self, this_locale):
+        # check for relative path
+        if os.path.exists(os.path.join(self.location, 'i18n', this_locale)):
+            print('[i18n] Using ' + this_locale + '. Non-production testing.')
+            return os.path.join(self.location, 'i18n', this_locale)
+        elif os.path.exists(os.path.join('/pardus', this_locale)):
+            print('[i18n] Using ' + this_locale)
+            return os.path.join('/pardus', this_locale)
+        else:
+            print('[i18n] Locale ' + this_locale + ' not available.')
+            return None
+
+    def _load_manifest(self):
+        # if no locale exists, try a generic locale.
+        locale_dir = self._find_locale_dir(self.locale_name)
+        if not locale_dir:
+            locale_generic = self.locale_name.split('_')[0]
+            print('[i18n] Trying ' + locale_generic + '...')
+            locale_dir = self._find_locale_dir(locale_generic)
+        if not locale_dir:
+            return {}
+
+        # Adding or removing a slide changes the modification time of its directory.
+        try:
+            key = [locale_dir, os.stat(self.data_path).st_mtime, os.stat(locale_dir).st_mtime]
+        except OSError:
+            return {}
+        cache = JsonCache('translations-' + self.locale_name + '.json')
+        manifest = cache.load(key)
+        if manifest is None:
+            translated = set(os.listdir(locale_dir))
+            manifest = {}
+            for slide in os.listdir(self.data_path):
+                if slide.endswith('.html') and slide in translated:
+                    manifest[slide] = os.path.join(locale_dir, slide)
+            cache.save(key, manifest)
+            arg.print_verbose('i18n', 'Found %s translations of %d slides' % (self.locale_name, len(manifest)))
+        return manifest
+
+    def path_for(self, slide_name):
+        ''' Returns the translated slide, or None to use the original. '''
+        if self._manifest is None:
+            self._manifest = self._load_manifest()
+        return self._manifest.get(slide_name)
+
+
+class PageStore(object):
+    ''' Reads slides from disk without blocking, keeping the most recently used
+        'max_pages' of them in memory. Translated slides are used when
+        'translations' (a SlideTranslations) has one. '''
+
+    # Pages that are likely to be opened next, read while the user is still reading this one.
+    preload_after = {
+        'splash.html': ['index.html'],
+        'index.html': ['software.html'],
+    }
+
+    def __init__(self, translations=None, max_pages=8):
+        self.max_pages = max_pages
+        self.translations = translations
+        self._pages = OrderedDict()
+        self._waiting = {}
+
+    def _file_for(self, uri):
+        name = os.path.basename(urllib.parse.urlparse(uri).path)
+        path = self.translations.path_for(name) if self.translations else None
+        if path:
+            return (name, Gio.File.new_for_path(path))
+        arg.print_verbose('i18n', 'No translation of %s found. Will use version in _data_path' % name)
+        return (name, Gio.File.new_for_uri(uri))
+
+    def get(self, uri, callback=None):
+        ''' Calls 'callback(html)' once the page has been read, or with None on failure. '''
+        name, gfile = self._file_for(uri)
+        if name in self._pages:
+            self._pages.move_to_end(name)
+            if callback:
+                callback(self._pages[name])
+            return
+
+        if name in self._waiting:
+            self._waiting[name].append(callback)
+            return
+
+        self._waiting[name] = [callback]
+        gfile.load_contents_async(None, self._loaded_cb, name)
+
+    def preload(self, uri):
+        head = uri.rsplit('/', 1)[0]
+        for name in self.preload_after.get(uri.rsplit('/', 1)[1], []):
+            if name not in self._pages:
+                arg.print_verbose('Welcome', 'Preloading ' + name)
+                self.get(head + '/' + name)
+
+    def _loaded_cb(self, gfile, result, name):
+        try:
+            contents = gfile.load_contents_finish(result)[1]
+            # Use UTF-8 encoding as fix for &nbsp chars in translated html.
+            html = contents.decode('utf-8')
+        except (GLib.Error, UnicodeDecodeError) as err:
+            print('[Welcome] Failed to read ' + gfile.get_path() + ': ' + str(err))
+            html = None
+        else:
+            self._pages[name] = html
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+        for callback in self._waiting.pop(name):
+            if callback:
+                callback(html)
+
+
 class AppView(WebKit.WebView):
-    def __init__(self, slide_list = None):
+    def __init__(self, translations = None):
         """
             Args:
-            slide_list : A list of tuples containing the filenames of translated html files
-                         or, if no translation is available, the filename of the original
-                         untranslated slide
+            translations : A SlideTranslations used to find translated html files.
+                           Slides without a translation are loaded from their original location.
         """
         WebKit.WebView.__init__(self)
         WebKit.WebView.__init__(self)
         self._config = WelcomeConfig()
-        self._apt_cache = apt.Cache()
         self.connect('load-finished', self._load_finished_cb)
         self.connect('navigation-policy-decision-requested', self._nav_request_policy_decision_cb)
         self.l_uri = None
-        self._slide_list = slide_list
+        self._pages = PageStore(translations)
 
         self.set_zoom_level(systemstate.zoom_level)
         print('[Welcome] Setting zoom level to: ' + str(systemstate.zoom_level))
@@ -653,39 +1185,37 @@ class AppView(WebKit.WebView):
         # Perform a smooth transition for footer icons.
         self.do_smooth_footer = False
 
+        systemstate.connectivity.connect(self._connection_changed_cb)
+
     def _push_config(self):
+        page = PageState()
+
+        # A freshly loaded page shows whatever its markup says for every application.
+        dynamicapps.shown_state = {}
+
         ### Global - On all pages ###
-        self.execute_script("$('#os_title').html('%s')" % self._config.os_title)
-        self.execute_script("$('#os_version').html('%s')" % self._config.os_version)
-        self.execute_script("$('#autostart').toggleClass('fa-check-square', %s).toggleClass('fa-square', %s)" % (json.dumps(self._config.autostart), json.dumps(not self._config.autostart)))
+        page.html('#os_title', self._config.os_title)
+        page.html('#os_version', self._config.os_version)
+        page.jq('#autostart', 'toggleClass', 'fa-check-square', self._config.autostart)
+        page.jq('#autostart', 'toggleClass', 'fa-square', not self._config.autostart)
 
         # If this is a Live session (booted from ISO) show the
         # 'Install OS' button, if running on an installed system show
         # the 'Install Software' button.
-        if systemstate.session_type == 'live':
-            self.execute_script("$('#install').show();")
-            self.execute_script("$('#software').hide();")
-            self.execute_script("$('.live-session').hide();")
-            self.execute_script("$('.live-session-only').show();")
-        else:
-            self.execute_script("$('#install').hide();")
-            self.execute_script("$('#software').show();")
-            self.execute_script("$('.live-session').show();")
-            self.execute_script("$('.live-session-only').hide();")
+        is_live = systemstate.session_type == 'live'
+        page.visible('#install', is_live)
+        page.visible('#software', not is_live)
+        page.visible('.live-session', not is_live)
+        page.visible('.live-session-only', is_live)
 
         # If started from a Raspberry Pi.
-        if systemstate.session_type == 'pi':
-            self.execute_script("$('.rpi-only').show();")
-        else:
-            self.execute_script("$('.rpi-only').hide();")
+        page.visible('.rpi-only', systemstate.session_type == 'pi')
 
         # Display warnings if the user is not connected to the internet.
-        if systemstate.is_online:
-            self.execute_script("$('.offline').hide();")
-            self.execute_script("$('.online').show();")
-        else:
-            self.execute_script("$('.offline').show();")
-            self.execute_script("$('.online').hide();")
+        # An outdated result is checked again in the background.
+        systemstate.connectivity.check()
+        page.visible('.offline', not systemstate.is_online)
+        page.visible('.online', systemstate.is_online)
 
         ## Social Links ##
         footer_left = '<div id="social" class="pull-left"> \
@@ -712,180 +1242,175 @@ class AppView(WebKit.WebView):
         # Do not show footer links on splash or software page.
         if not arg.jump_software_page:
             if not self.current_page == 'splash.html' and not self.current_page == 'software.html':
-                self.execute_script("$('#footer-global-left').html('" + footer_left + "');")
+                page.html('#footer-global-left', footer_left)
 
         # Show the button depending on context.
         footer_close = '<a href="cmd://quit" class="btn btn-inverse">' + _("Close") + '&zwnj;</a>'
         footer_skip  = '<a onclick="continueToPage(true)" class="btn btn-inverse">' + _("Skip") + '</a>'
 
         if self.current_page == 'splash.html':
-            self.execute_script("$('#footer-global-right').html('" + footer_skip + "');")
+            page.html('#footer-global-right', footer_skip)
         elif arg.jump_software_page:
             # Do not show a "Close" button for the Boutique.
             pass
         else:
-            self.execute_script("$('#footer-global-right').html('" + footer_close + "');")
+            page.html('#footer-global-right', footer_close)
 
         # Smoothly fade in the footer links between pages.
         #   splash → index
         #   index ← → software
         if self.do_smooth_footer or self.current_page == 'software.html':
             self.do_smooth_footer = False
-            self.execute_script("$('#footer-left').hide();")
-            self.execute_script("$('#footer-left').fadeIn();")
+            page.hide('#footer-left')
+            page.jq('#footer-left', 'fadeIn')
 
         # Individual Page Actions
         ### Main Menu ###
         if self.current_page == 'index.html':
             if systemstate.session_type == 'guest':
                 # Disable features that are unavailable to guests.
-                self.execute_script("$('#gettingstarted').hide();")
-                self.execute_script("$('#software').hide();")
-                self.execute_script("$('#introduction').addClass('btn-success');")
-                self.execute_script("$('#community').addClass('btn-success');")
+                page.hide('#gettingstarted')
+                page.hide('#software')
+                page.jq('#introduction', 'addClass', 'btn-success')
+                page.jq('#community', 'addClass', 'btn-success')
 
             # Check whether the system is subscribed for receiving more up-to-date versions of Welcome.
-            self.execute_script('$("#update-subscribing").hide()')
+            page.hide('#update-subscribing')
             if not systemstate.updates_subscribed:
                 if systemstate.is_online:
-                    self.execute_script('$("#update-notification").fadeIn("slow")')
+                    page.jq('#update-notification', 'fadeIn', 'slow')
             else:
-                self.execute_script('$("#update-notification").hide()')
+                page.hide('#update-notification')
 
             # Disable confetti on machines that may suffer performance issues.
-            if systemstate.arch == 'armhf':
-                self.execute_script('var disable_confetti = true;')
-            elif systemstate.arch == 'powerpc':
-                self.execute_script('var disable_confetti = true;')
-            else:
-                self.execute_script('var disable_confetti = false;')
+            page.set_var('disable_confetti', systemstate.arch in ['armhf', 'powerpc'])
 
             # Special event strings.
-            self.execute_script('var days_in = "&zwnj;in&zwnj;"')
-            self.execute_script('var future_days = "&zwnj;days.&zwnj;"')
-            self.execute_script('var days_ago = "&zwnj;days ago.&zwnj;"')
-            self.execute_script('var yesterday = "&zwnj;yesterday.&zwnj;"')
-            self.execute_script('var tomorrow = "&zwnj;tomorrow.&zwnj;"')
-            self.execute_script('var years_ago = "&zwnj;years ago today.&zwnj;"')
-            self.execute_script('var today_string = "&zwnj;today.&zwnj;"')
-            self.execute_script('var years_old = "&zwnj;years old&zwnj;"')
+            page.set_var('days_in', '&zwnj;in&zwnj;')
+            page.set_var('future_days', '&zwnj;days.&zwnj;')
+            page.set_var('days_ago', '&zwnj;days ago.&zwnj;')
+            page.set_var('yesterday', '&zwnj;yesterday.&zwnj;')
+            page.set_var('tomorrow', '&zwnj;tomorrow.&zwnj;')
+            page.set_var('years_ago', '&zwnj;years ago today.&zwnj;')
+            page.set_var('today_string', '&zwnj;today.&zwnj;')
+            page.set_var('years_old', '&zwnj;years old&zwnj;')
 
-            self.execute_script('var flavour_anniversary_future  = "&zwnj;Ubuntu MATE\'s official flavour anniversary&zwnj;"')
-            self.execute_script('var flavour_anniversary_present = "&zwnj;Ubuntu MATE become an official flavour&zwnj;"')
-            self.execute_script('var flavour_anniversary_past    = "&zwnj;Ubuntu MATE\'s official flavour anniversary was&zwnj;"')
+            page.set_var('flavour_anniversary_future',  '&zwnj;Ubuntu MATE\'s official flavour anniversary&zwnj;')
+            page.set_var('flavour_anniversary_present', '&zwnj;Ubuntu MATE become an official flavour&zwnj;')
+            page.set_var('flavour_anniversary_past',    '&zwnj;Ubuntu MATE\'s official flavour anniversary was&zwnj;')
 
-            self.execute_script('var project_birthday_future  = "&zwnj;Ubuntu MATE will be&zwnj;"')
-            self.execute_script('var project_birthday_present = "&zwnj;Ubuntu MATE is&zwnj;"')
-            self.execute_script('var project_birthday_past    = "&zwnj;Ubuntu MATE turned&zwnj;"')
+            page.set_var('project_birthday_future',  '&zwnj;Ubuntu MATE will be&zwnj;')
+            page.set_var('project_birthday_present', '&zwnj;Ubuntu MATE is&zwnj;')
+            page.set_var('project_birthday_past',    '&zwnj;Ubuntu MATE turned&zwnj;')
 
-            self.execute_script('var project_birthday         = "&zwnj;Happy Birthday!&zwnj;"')
-            self.execute_script('var celebrate_new_year       = "&zwnj;Happy New Year from Ubuntu MATE!&zwnj;"')
+            page.set_var('project_birthday',         '&zwnj;Happy Birthday!&zwnj;')
+            page.set_var('celebrate_new_year',       '&zwnj;Happy New Year from Ubuntu MATE!&zwnj;')
 
-            self.execute_script('var project_release_future   = "&zwnj;will be released&zwnj;"')
-            self.execute_script('var project_release_present  = "&zwnj;is released today!&zwnj;"')
-            self.execute_script('var project_release_past     = "&zwnj;was released&zwnj;"')
-            self.execute_script('var project_release_thanks   = "&zwnj;Thank you for testing&zwnj;"')
+            page.set_var('project_release_future',   '&zwnj;will be released&zwnj;')
+            page.set_var('project_release_present',  '&zwnj;is released today!&zwnj;')
+            page.set_var('project_release_past',     '&zwnj;was released&zwnj;')
+            page.set_var('project_release_thanks',   '&zwnj;Thank you for testing&zwnj;')
 
-            self.execute_script('checkDates();')
+            page.call('checkDates')
 
         ### Splash ###
         if self.current_page == 'splash.html':
             self.do_smooth_footer = True
             # Determine which screen to show after the splash screen.
             if systemstate.session_type == 'live':
-                self.execute_script('var splashNextPage = "hellolive"')
+                page.set_var('splashNextPage', 'hellolive')
             elif systemstate.session_type == 'guest':
-                self.execute_script('var splashNextPage = "helloguest"')
+                page.set_var('splashNextPage', 'helloguest')
             else:
-                self.execute_script('var splashNextPage = "index"')
+                page.set_var('splashNextPage', 'index')
 
             # Smoothly fade footer when entering main menu.
             self.splash_finished = True
 
         ### Chat Page ###
         if self.current_page == 'chatroom.html':
-            if self._apt_cache['hexchat'].is_installed:
-                self.execute_script("$('.hexchat').show();")
-                self.execute_script("$('.webchat').hide();")
-            else:
-                self.execute_script("$('.hexchat').hide();")
-                self.execute_script("$('.webchat').show();")
+            hexchat_installed = dpkgstatus.is_installed('hexchat')
+            page.visible('.hexchat', hexchat_installed)
+            page.visible('.webchat', not hexchat_installed)
 
         ### Getting Started Page ###
         if self.current_page == 'gettingstarted.html':
             # Display information tailored to graphics vendor (Getting Started / Drivers)
-            self.execute_script('var graphicsVendor = "' + systemstate.graphics_vendor + '";')
-            self.execute_script('var graphicsGrep = "' + systemstate.graphics_grep + '";')
-            self.execute_script('$("#boot-mode").html("' + systemstate.boot_mode + '")')
+            page.set_var('graphicsVendor', systemstate.graphics_vendor)
+            page.set_var('graphicsGrep', systemstate.graphics_grep)
+            page.html('#boot-mode', systemstate.boot_mode)
 
             # Update any applications featured on these pages.
-            dynamicapps.update_app_status(self, 'hardinfo')
-            dynamicapps.update_app_status(self, 'gparted')
-            dynamicapps.update_app_status(self, 'gnome-disk-utility')
-            dynamicapps.update_app_status(self, 'mate-disk-usage-analyzer')
-            dynamicapps.update_app_status(self, 'mate-system-monitor')
-            dynamicapps.update_app_status(self, 'psensor')
-            dynamicapps.update_app_status(self, 'boot-repair')
-            dynamicapps.update_app_status(self, 'codecs')
-            dynamicapps.update_app_status(self, 'firmware')
-            dynamicapps.update_app_status(self, 'hp-printer')
-            dynamicapps.update_app_status(self, 'keyboard-chinese')
-            dynamicapps.update_app_status(self, 'keyboard-japanese')
-            dynamicapps.update_app_status(self, 'keyboard-korean')
+            for program_id in ['hardinfo', 'gparted', 'gnome-disk-utility', 'mate-disk-usage-analyzer',
+                               'mate-system-monitor', 'psensor', 'boot-repair', 'codecs', 'firmware',
+                               'hp-printer', 'keyboard-chinese', 'keyboard-japanese', 'keyboard-korean']:
+                dynamicapps.update_app_status(self, program_id, page)
 
         ### Software Page ###
         if self.current_page == 'software.html':
-            dynamicapps.hide_non_free = False
             self.do_smooth_footer = True
 
             # If loading a minimal "Get More Software" only page.
             if arg.jump_software_page:
-                self.execute_script('$("#menu-button").hide()')
-                self.execute_script('$("#navigation-title").html("<span id=\'navigation-sub-title\'>Curated software collection</span>")')
-                self.execute_script('$("#navigation-sub-title").css("color","#DED9CB")')
+                page.hide('#menu-button')
+                page.html('#navigation-title', '<span id=\'navigation-sub-title\'>Curated software collection</span>')
+                page.jq('#navigation-sub-title', 'css', 'color', '#DED9CB')
 
             # Pass 'Servers' variable used for one-click server links.
-            self.execute_script('var server_string = "' + _("Servers") + '"')
+            page.set_var('server_string', _("Servers"))
 
             # Dynamically load application lists.
-            dynamicapps.populate_categories(self)
-            dynamicapps.update_all_app_status(self)
-            dynamicapps.populate_featured_apps(self)
+            dynamicapps.populate_categories(page)
+            dynamicapps.update_all_app_status(self, page)
+            dynamicapps.populate_featured_apps(page)
+            page.call('initAppSearch', _("Search applications"), _("No applications found"),
+                      _("No application matches the words you searched for. Try different words."))
 
             # Show a different footer in the Boutique.
-            self.execute_script("$('#footer-global-left').html('" + boutique_footer + "');")
+            page.html('#footer-global-left', boutique_footer)
 
             # Set version and subscription details.
-            self.execute_script('$("#boutique-version").html("' + systemstate.welcome_version + '")')
+            page.html('#boutique-version', systemstate.welcome_version)
             if systemstate.updates_subscribed:
-                self.execute_script('$("#update-subscribed").show()')
+                page.show('#update-subscribed')
             else:
-                self.execute_script('$("#update-notification").show()')
+                page.show('#update-notification')
 
         ### Raspberry Pi Page ###
         if self.current_page == 'rpi.html':
             # Check file system resize flag.
-            systemstate.rpi_resize('check', self)
+            systemstate.rpi_resize('check', page=page)
 
         ### Donate ###
         if self.current_page == 'donate.html':
             # Pass translatable short-hand month strings for the supporters grid.
-            self.execute_script('short_jan = "' + _("Jan") + '"')
-            self.execute_script('short_feb = "' + _("Feb") + '"')
-            self.execute_script('short_mar = "' + _("Mar") + '"')
-            self.execute_script('short_apr = "' + _("Apr") + '"')
-            self.execute_script('short_may = "' + _("May") + '"')
-            self.execute_script('short_jun = "' + _("Jun") + '"')
-            self.execute_script('short_jul = "' + _("Jul") + '"')
-            self.execute_script('short_aug = "' + _("Aug") + '"')
-            self.execute_script('short_sep = "' + _("Sep") + '"')
-            self.execute_script('short_oct = "' + _("Oct") + '"')
-            self.execute_script('short_nov = "' + _("Nov") + '"')
-            self.execute_script('short_dec = "' + _("Dec") + '"')
+            page.set_var('short_jan', _("Jan"))
+            page.set_var('short_feb', _("Feb"))
+            page.set_var('short_mar', _("Mar"))
+            page.set_var('short_apr', _("Apr"))
+            page.set_var('short_may', _("May"))
+            page.set_var('short_jun', _("Jun"))
+            page.set_var('short_jul', _("Jul"))
+            page.set_var('short_aug', _("Aug"))
+            page.set_var('short_sep', _("Sep"))
+            page.set_var('short_oct', _("Oct"))
+            page.set_var('short_nov', _("Nov"))
+            page.set_var('short_dec', _("Dec"))
+
+        # Apply everything for this page with a single script call.
+        page.apply(self)
 
     def _load_finished_cb(self, view, frame):
         self._push_config()
 
+    def _connection_changed_cb(self, online):
+        page = PageState()
+        page.visible('.offline', not online)
+        page.visible('.online', online)
+        page.visible('#specs-has-net', online)
+        page.visible('#specs-has-no-net', not online)
+        page.apply(self)
+
     def _nav_request_policy_decision_cb(self, view, frame, net_req, nav_act, pol_dec):
         uri = net_req.get_uri()
         self.current_page = uri.rsplit('/', 1)[1]
@@ -906,33 +1431,28 @@ class AppView(WebKit.WebView):
 
         self.l_uri = uri
 
-        if self._slide_list is None:
-            # no translations have to been specified, so we can just load the specified page..
-            page = urllib.request.urlopen(uri)
-        else:
-            # find the slide in slide_list
-            head, slide_name = os.path.split(uri)
-            found = False
-            for slide in self._slide_list:
-                head, trans_slide_name = os.path.split(slide)
-                if slide_name == trans_slide_name:
-                    found = True
-                    # load the translated html
-                    trans_uri = urllib.parse.urljoin('file:', urllib.request.pathname2url(slide))
-                    page = urllib.request.urlopen(trans_uri)
-                    break
-
-            if not found:
-                # this should never happen, but if it does, recover by loading the originally specified page
-                arg.print_verbose('Translation','Couldn''t find slide %s when getting translation' %uri)
-                page = urllib.request.urlopen(uri)
-
-        # use UTF-8 encoding as fix for &nbsp chars in translated html
-        #
-        # When loading the html, for the base_uri, use the uri of the originally specified
-        # page (which will be in _data_path) rather than the uri of any translated html we may be using instead.
-        # Doing this allows the js, css, fonts etc. directories to be located by the translated page,
-        frame.load_string(page.read().decode(), "text/html", "UTF-8", uri);
+        # Output from "inxi" is only wanted while the specs page is shown.
+        systemstate.stop_inxi()
+
+        def show_page(html):
+            # Another page may have been requested while this one was read.
+            if uri != self.l_uri:
+                return
+
+            # As 'l_uri' is this page, WebKit is now allowed to load the original file itself,
+            # rather than the same link later loading it untranslated.
+            if html is None:
+                print('[Welcome] ERROR: Could not read ' + uri + '. Loading it without translation.')
+                frame.load_uri(uri)
+                return
+
+            # When loading the html, for the base_uri, use the uri of the originally specified
+            # page (which will be in _data_path) rather than the uri of any translated html we may be using instead.
+            # Doing this allows the js, css, fonts etc. directories to be located by the translated page,
+            frame.load_string(html, "text/html", "UTF-8", uri)
+            self._pages.preload(uri)
+
+        self._pages.get(uri, show_page)
 
         pol_dec.ignore()
         return True
@@ -950,41 +1470,32 @@ class AppView(WebKit.WebView):
             dynamicapps.modify_app(self, 'upgrade', uri[14:])
         elif uri.startswith('launch-appid?'):
             dynamicapps.launch_app(uri[13:])
-        elif uri.startswith('filter-apps?'):
-            filter_name = uri.split('?')[1]
-            nonfree_toggle = uri.split('?')[2]
-            if nonfree_toggle == 'toggle':
-                dynamicapps.apply_filter(self, filter_name, True)
-            else:
-                dynamicapps.apply_filter(self, filter_name)
+        elif uri.startswith('search-apps?'):
+            dynamicapps.search_apps(self, urllib.parse.unquote(uri[12:]))
         elif uri.startswith('app-info-show?'):
             appid = uri.split('?')[1]
-            self.execute_script('$("#info-show-' + appid + '").hide()')
-            self.execute_script('$("#info-hide-' + appid + '").show()')
-            self.execute_script('$("#details-' + appid + '").fadeIn("fast")')
+            page = PageState()
+            page.hide('#info-show-' + appid)
+            page.show('#info-hide-' + appid)
+            dynamicapps.show_screenshots(self, appid, page)
+            page.jq('#details-' + appid, 'fadeIn', 'fast')
+            page.apply(self)
         elif uri.startswith('app-info-hide?'):
             appid = uri.split('?')[1]
-            self.execute_script('$("#info-show-' + appid + '").show()')
-            self.execute_script('$("#info-hide-' + appid + '").hide()')
-            self.execute_script('$("#details-' + appid + '").fadeOut("fast")')
+            page = PageState()
+            page.show('#info-show-' + appid)
+            page.hide('#info-hide-' + appid)
+            page.jq('#details-' + appid, 'fadeOut', 'fast')
+            page.apply(self)
         elif uri.startswith('screenshot?'):
             filename = uri.split('?')[1]
             dynamicapps.show_screenshot(filename)
         elif uri == 'apt-update':
-            update_repos()
-            self._apt_cache.close()
-            self._apt_cache = apt.Cache()
-            self._push_config()
+            run_maintenance('update', self)
         elif uri == 'fix-incomplete-install':
-            fix_incomplete_install()
-            self._apt_cache.close()
-            self._apt_cache = apt.Cache()
-            self._push_config()
+            run_maintenance('fix-incomplete-install', self)
         elif uri == 'fix-broken-depends':
-            fix_broken_depends()
-            self._apt_cache.close()
-            self._apt_cache = apt.Cache()
-            self._push_config()
+            run_maintenance('fix-broken-depends', self)
         elif uri == 'get-aacs-db':
             self.execute_script('$(".bluray-applying").show()')
             get_aacs_db()
@@ -1025,31 +1536,32 @@ class AppView(WebKit.WebView):
         elif uri.startswith('link?'):
             webbrowser.open_new_tab(uri[5:])
         elif uri == 'checkInternetConnection':
-            systemstate.check_internet_connection()
-            if systemstate.is_online:
-                self.execute_script("$('.offline').hide();")
-                self.execute_script("$('.online').show();")
-            else:
-                self.execute_script("$('.offline').show();")
-                self.execute_script("$('.online').hide();")
+            # The page is updated by _connection_changed_cb if the result differs.
+            systemstate.connectivity.check(force=True)
         elif uri == 'resize-rpi':
             systemstate.rpi_resize('do-resize', self)
         elif uri == 'reboot-rpi':
             systemstate.rpi_resize('reboot')
         elif uri == 'subscribe-updates':
             print('[Welcome] Subscribing to Ubuntu MATE Welcome Updates...')
-            self.execute_script("$('#update-notification').hide()")
-            self.execute_script("$('#update-subscribing').show()")
-            dynamicapps.modify_app(self, 'install', 'ubuntu-mate-welcome')
-            # Verify if the PPA was successfully added.
-            if os.path.exists(systemstate.welcome_ppa_file):
-                if os.path.getsize(systemstate.welcome_ppa_file) > 0:
+            page = PageState()
+            page.hide('#update-notification')
+            page.show('#update-subscribing')
+            page.apply(self)
+
+            def subscribed(success):
+                # Verify if the PPA was successfully added.
+                ppa_file = systemstate.welcome_ppa_file
+                if os.path.exists(ppa_file) and os.path.getsize(ppa_file) > 0:
                     print('[Welcome] Success, PPA added! Application restarting...')
                     os.execv(__file__, sys.argv)
-            else:
                 print('[Welcome] Failed, PPA not detected!')
-                self.execute_script('$("#update-subscribing").hide()')
-                self.execute_script('$("#update-notification").show()')
+                page = PageState()
+                page.hide('#update-subscribing')
+                page.show('#update-notification')
+                page.apply(self)
+
+            dynamicapps.modify_app(self, 'install', 'ubuntu-mate-welcome', subscribed)
         elif uri == 'init-system-info':
             systemstate.get_system_info(self)
         else:
@@ -1077,17 +1589,10 @@ class WelcomeApp(object):
 
         self._build_app()
 
-    def _get_translated_slides(self):
+    def _get_translations(self):
         """ If a locale has been specified on the command line, get translated slides
-            for that. If not, get translated slides for the current locale
-
-        Do not assume that every slide has a translation, check each file individually
-
-        Returns:
-            a list of filenames of translated slides - if there is no translated version
-            of a slide, the filename of the untranslated version from the _data_path directory
-            is used instead
-
+            for that. If not, get translated slides for the current locale.
+            Slides are only looked up once they are opened.
         """
 
         if (arg.locale is not None):
@@ -1095,43 +1600,7 @@ class WelcomeApp(object):
         else:
             locale_to_use = str(locale.getlocale()[0])
 
-        def set_locale_dir(this_locale):
-            # check for relative path
-            if (os.path.exists(os.path.join(self._location, 'i18n', this_locale))):
-                locale_dir = os.path.join(self._location, 'i18n', this_locale)
-                print('[i18n] Using ' + this_locale + '. Non-production testing.')
-            elif (os.path.exists(os.path.join('/pardus', this_locale))):
-                locale_dir = os.path.join('/pardus', this_locale)
-                print('[i18n] Using ' + this_locale)
-            else:
-                locale_dir = ''
-                print('[i18n] Locale ' + this_locale + ' not available.')
-
-            return locale_dir
-
-        # if no locale exists, try a generic locale.
-        locale_dir = set_locale_dir(locale_to_use)
-        if locale_dir == '':
-            locale_generic = locale_to_use.split('_')[0]
-            print('[i18n] Trying ' + locale_generic + '...')
-            locale_dir = set_locale_dir(locale_generic)
-
-        results = []
-
-        slides = glob.glob(os.path.join(self._data_path, '*.html'))
-        for slide in slides:
-            # get the slide name and see if a translated version exists
-            head, slide_name = os.path.split(slide)
-
-            trans_slide = os.path.join(locale_dir, slide_name)
-            if os.path.exists(trans_slide):
-                results.append(trans_slide)
-                arg.print_verbose("i18n","Will use %s translation of %s" %(locale_to_use, slide_name))
-            else:
-                results.append(slide)
-                arg.print_verbose("i18n","No %s translation of %s found. Will use version in _data_path" %(locale_to_use, slide))
-
-        return results
+        return SlideTranslations(locale_to_use, self._location, self._data_path)
 
     def _build_app(self):
 
@@ -1184,10 +1653,8 @@ class WelcomeApp(object):
         icon_dir = os.path.join(self._data_path, 'img', 'welcome', 'pardusarm.png')
         w.set_icon_from_file(icon_dir)
 
-        #get the translated slide list
-        trans_slides = self._get_translated_slides()
-        # build webkit container
-        mv = AppView(trans_slides)
+        # build webkit container, which finds translated slides as they are opened
+        mv = AppView(self._get_translations())
 
         # load our index file
         file = os.path.abspath(os.path.join(self._data_path, load_file))
@@ -1220,55 +1687,500 @@ class WelcomeApp(object):
         Gtk.main_quit(p1, p2);
 
 
+class CommandStream(object):
+    ''' Runs a command without blocking the main loop. Its output is passed
+        to 'on_lines' in batches, at most once every 'batch_interval' ms. '''
+
+    def __init__(self, command, on_lines, on_finish=None, timeout=30, batch_interval=250):
+        self.command = command
+        self.on_lines = on_lines
+        self.on_finish = on_finish
+        self.timeout = timeout
+        self.batch_interval = batch_interval
+        self.running = False
+        self._process = None
+        self._sources = []
+        self._partial = b''
+        self._pending = []
+
+    def start(self):
+        ''' Returns False if the command could not be started. '''
+        try:
+            self._process = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+
+        self.running = True
+        fd = self._process.stdout.fileno()
+        self._sources = [
+            GLib.io_add_watch(fd, GLib.PRIORITY_DEFAULT, GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR, self._on_output),
+            GLib.timeout_add(self.batch_interval, self._on_batch),
+        ]
+        if self.timeout:
+            self._sources.append(GLib.timeout_add_seconds(self.timeout, self._on_timeout))
+        return True
+
+    def cancel(self):
+        if self.running:
+            self._finish('cancelled')
+
+    def _on_output(self, fd, condition):
+        data = b''
+        if condition & GLib.IO_IN:
+            data = os.read(fd, 65536)
+        if not data:
+            self._finish('done')
+            return False
+
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        self._pending += [line.decode('utf-8', 'replace') for line in lines]
+        return True
+
+    def _on_batch(self):
+        if self._pending:
+            lines, self._pending = self._pending, []
+            self.on_lines(lines)
+        return True
+
+    def _on_timeout(self):
+        arg.print_verbose('Command', 'Timed out after ' + str(self.timeout) + ' seconds: ' + ' '.join(self.command))
+        self._finish('timeout')
+        return False
+
+    def _finish(self, status):
+        self.running = False
+        for source in self._sources:
+            GLib.source_remove(source)
+        self._sources = []
+
+        if status == 'cancelled':
+            self._pending = []
+        else:
+            if self._partial:
+                self._pending.append(self._partial.decode('utf-8', 'replace'))
+            self._on_batch()
+        self._partial = b''
+
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.stdout.close()
+        self._process.wait()
+
+        if self.on_finish:
+            self.on_finish(status)
+
+
+class ConnectivityMonitor(object):
+    ''' Keeps track of whether the internet can be reached, without blocking the main loop.
+        A check opens a TCP connection to 'host' and 'port' and sends nothing.
+        Results are trusted for 'ttl' seconds. While offline, checks are retried
+        after 'retry' seconds, doubling each time up to 'max_retry' seconds. '''
+
+    def __init__(self, host='pardusarm.com', port=80, timeout=2, ttl=300, retry=5, max_retry=300):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.ttl = ttl
+        self.retry = retry
+        self.max_retry = max_retry
+        self.online = None
+        self.checked_at = None
+        self._checking = False
+        self._failures = 0
+        self._retry_source = None
+        self._listeners = []
+
+    def connect(self, callback):
+        ''' Call 'callback(online)' on the main loop whenever connectivity changes. '''
+        self._listeners.append(callback)
+
+    def watch_network_monitor(self):
+        ''' Check again as soon as the network configuration changes. '''
+        try:
+            Gio.NetworkMonitor.get_default().connect('network-changed', lambda monitor, available: self.check(force=True))
+        except Exception as err:
+            arg.print_verbose('Network Test', 'Network changes will not be monitored: ' + str(err))
+
+    def probe(self):
+        ''' Blocking check. Safe to call from any thread. '''
+        print('[Network Test] Checking for internet connectivity... ')
+
+        if arg.simulate_no_connection:
+            print('[Network Test] Simulation argument override. Retrying will reset this.')
+            arg.simulate_no_connection = False
+            online = False
+        elif arg.simulate_force_connection:
+            print('[Network Test] Simulation argument override. Forcing connection presence.')
+            print('[Network Test] WARNING: Do not attempt to install/remove software offline as this may lead to errors later!')
+            online = True
+        else:
+            try:
+                socket.create_connection((self.host, self.port), self.timeout).close()
+            except socket.timeout:
+                print('[Network Test] -- Timed out connecting to {0}:{1}'.format(self.host, self.port))
+                online = False
+            except OSError:
+                print('[Network Test] -- Could not establish a connection to {0}:{1}'.format(self.host, self.port))
+                online = False
+            else:
+                print('[Network Test] Successfully connected to {0}:{1}'.format(self.host, self.port))
+                online = True
+
+        self.online = online
+        self.checked_at = time.monotonic()
+        return online
+
+    def is_fresh(self):
+        return self.checked_at is not None and time.monotonic() - self.checked_at < self.ttl
+
+    def check(self, force=False):
+        ''' Check in a background thread, unless a recent result is still valid. '''
+        if self._checking or (self.is_fresh() and not force):
+            return
+        if self._retry_source:
+            GLib.source_remove(self._retry_source)
+            self._retry_source = None
+
+        self._checking = True
+        previous = self.online
+        def run():
+            online = self.probe()
+            GLib.idle_add(self._checked, previous, online)
+        Thread(target=run, daemon=True).start()
+
+    def _checked(self, previous, online):
+        self._checking = False
+        if online:
+            self._failures = 0
+        else:
+            delay = min(self.retry * 2 ** self._failures, self.max_retry)
+            self._failures += 1
+            arg.print_verbose('Network Test', 'Checking again in ' + str(delay) + ' seconds.')
+            self._retry_source = GLib.timeout_add_seconds(delay, self._on_retry)
+
+        if online != previous:
+            for callback in self._listeners:
+                callback(online)
+        return False
+
+    def _on_retry(self):
+        self._retry_source = None
+        self.check(force=True)
+        return False
+
+
+class SystemInfoCollector(object):
+    ''' Reads system specifications directly from /proc, /sys and /etc, once each.
+        'root' can point to another directory with the same layout, such as a test fixture. '''
+
+    def __init__(self, root='/'):
+        self.root = root
+
+    def _read(self, *parts):
+        try:
+            with open(os.path.join(self.root, *parts), encoding='utf-8', errors='replace') as data_file:
+                return data_file.read()
+        except OSError:
+            return None
+
+    def _read_fields(self, text, separator):
+        ''' Parse "key <separator> value" lines, keeping the first of any repeated key. '''
+        fields = {}
+        for line in (text or '').splitlines():
+            if separator not in line:
+                continue
+            key, value = line.split(separator, 1)
+            key = key.strip()
+            if key and key not in fields:
+                fields[key] = value.strip()
+        return fields
+
+    def read_os_release(self):
+        fields = self._read_fields(self._read('etc', 'os-release'), '=')
+        for key in fields:
+            fields[key] = fields[key].strip('"\'')
+        return fields
+
+    def read_kernel(self):
+        release = self._read('proc', 'sys', 'kernel', 'osrelease')
+        if release:
+            return release.strip()
+        return os.uname().release
+
+    def read_cpu_speed(self, cpuinfo):
+        ''' Maximum speed in MHz if the CPU reports it, otherwise the current speed. '''
+        max_khz = self._read('sys', 'devices', 'system', 'cpu', 'cpu0', 'cpufreq', 'cpuinfo_max_freq')
+        try:
+            return int(max_khz) // 1000
+        except (TypeError, ValueError):
+            pass
+        try:
+            return int(float(cpuinfo['cpu MHz']))
+        except (KeyError, ValueError):
+            return None
+
+    def read_cpu_op_modes(self, cpuinfo, machine):
+        flags = cpuinfo.get('flags', '').split()
+        if 'lm' in flags or machine in ['x86_64', 'aarch64', 'ppc64', 'ppc64le']:
+            return '32-bit, 64-bit'
+        return '32-bit'
+
+    def read_memory(self):
+        ''' Total memory in bytes. '''
+        meminfo = self._read_fields(self._read('proc', 'meminfo'), ':')
+        try:
+            return int(meminfo['MemTotal'].split()[0]) * 1024
+        except (KeyError, ValueError, IndexError):
+            return None
+
+    def read_root_partition(self):
+        root_partition = None
+        for line in (self._read('proc', 'self', 'mounts') or '').splitlines():
+            fields = line.split()
+            if len(fields) > 1 and fields[1] == '/' and fields[0] != 'rootfs':
+                root_partition = fields[0]
+
+        # Some systems (such as the Raspberry Pi) only mount "/dev/root".
+        if root_partition == '/dev/root':
+            for option in (self._read('proc', 'cmdline') or '').split():
+                if option.startswith('root=/dev/'):
+                    root_partition = option[5:]
+        return root_partition
+
+    def read_disk(self, partition):
+        ''' The disk containing a partition and its size in bytes. '''
+        name = os.path.basename(partition)
+        if os.path.exists(os.path.join(self.root, 'sys', 'block', name)):
+            disk = name
+        else:
+            matches = glob.glob(os.path.join(self.root, 'sys', 'block', '*', name))
+            if not matches:
+                return (None, None)
+            disk = os.path.basename(os.path.dirname(matches[0]))
+
+        # Sizes in /sys/block are always counted in 512 byte sectors.
+        try:
+            return (disk, int(self._read('sys', 'block', disk, 'size')) * 512)
+        except (TypeError, ValueError):
+            return (disk, None)
+
+    def read_boot_id(self):
+        boot_id = self._read('proc', 'sys', 'kernel', 'random', 'boot_id')
+        return boot_id.strip() if boot_id else None
+
+    def _mtime(self, *parts):
+        try:
+            return os.stat(os.path.join(self.root, *parts)).st_mtime
+        except OSError:
+            return None
+
+    def collect_distro(self):
+        os_release = self.read_os_release()
+        return {
+            'distro': os_release.get('PRETTY_NAME'),
+            'codename': os_release.get('VERSION_CODENAME', os_release.get('UBUNTU_CODENAME')),
+        }
+
+    def collect_hardware(self):
+        ''' Everything that can only change with a reboot. '''
+        info = {}
+        info['kernel'] = self.read_kernel()
+
+        board_name = self._read('sys', 'devices', 'virtual', 'dmi', 'id', 'board_name')
+        info['motherboard'] = board_name.strip() if board_name else None
+
+        cpuinfo = self._read_fields(self._read('proc', 'cpuinfo'), ':')
+        info['cpu_model'] = cpuinfo.get('model name', cpuinfo.get('Model', cpuinfo.get('Hardware')))
+        info['cpu_speed'] = self.read_cpu_speed(cpuinfo)
+        info['cpu_op_modes'] = self.read_cpu_op_modes(cpuinfo, os.uname().machine)
+        info['memory'] = self.read_memory()
+
+        # PowerPC machines describe themselves differently.
+        info['powerpc'] = {}
+        for key in ['motherboard', 'revision', 'cpu', 'clock', 'detected as', 'pmac-generation']:
+            if key in cpuinfo:
+                info['powerpc'][key] = cpuinfo[key]
+
+        info['root_partition'] = self.read_root_partition()
+        if info['root_partition']:
+            info['disk'], info['disk_size'] = self.read_disk(info['root_partition'])
+        else:
+            info['disk'], info['disk_size'] = (None, None)
+        return info
+
+    def collect_space(self):
+        try:
+            rootfs = os.statvfs(self.root)
+            return {'root_size': rootfs.f_blocks * rootfs.f_frsize,
+                    'root_free': rootfs.f_bavail * rootfs.f_frsize}
+        except OSError:
+            return {'root_size': None, 'root_free': None}
+
+    def collect(self, cache=None):
+        ''' Returns a dictionary of everything gathered. Missing data is None.
+            Given a JsonCache, only groups whose key has changed are read again. '''
+        groups = [
+            ('hardware', [self.read_boot_id()], self.collect_hardware),
+            ('distro', [self._mtime('etc', 'os-release')], self.collect_distro),
+        ]
+
+        stored = (cache.load(['groups']) if cache else None) or {}
+        changed = False
+        info = {}
+        for name, key, collect_group in groups:
+            if name in stored and stored[name]['key'] == key and None not in key:
+                arg.print_verbose('System Specs', 'Using cached data: ' + name)
+            else:
+                arg.print_verbose('System Specs', 'Gathering data: ' + name)
+                stored[name] = {'key': key, 'data': collect_group()}
+                changed = True
+            info.update(stored[name]['data'])
+
+        if cache and changed:
+            cache.save(['groups'], stored)
+
+        # A single system call, and likely to differ on every visit.
+        info.update(self.collect_space())
+        return info
+
+
+class ProbeRegistry(object):
+    ''' Runs startup probes on a small thread pool.
+        Each probe is given the results of the probes it depends on, which
+        must be registered first so they are always started before it. '''
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = {}
+
+    def register(self, name, function, depends=()):
+        for dependency in depends:
+            if dependency not in self._futures:
+                raise ValueError('Probe "' + name + '" depends on unregistered probe "' + dependency + '"')
+
+        def run():
+            args = [self._futures[dependency].result() for dependency in depends]
+            return function(*args)
+
+        self._futures[name] = self._executor.submit(run)
+
+    def future(self, name):
+        return self._futures[name]
+
+
+class ProbeResult(object):
+    ''' An attribute of SystemState that waits for its probe to finish.
+        Setting the attribute (eg. to simulate a system) replaces the result.
+        Use 'index' for probes returning several values. '''
+
+    def __init__(self, probe, index=None):
+        self.probe = probe
+        self.index = index
+        self.key = (probe, index)
+
+    def __get__(self, state, owner=None):
+        if state is None:
+            return self
+        if self.key in state.overrides:
+            return state.overrides[self.key]
+
+        try:
+            value = state.probes.future(self.probe).result()
+        except Exception as e:
+            print('[Welcome] Failed to detect "' + self.probe + '": ' + str(e))
+            raise
+
+        if self.index is not None:
+            return value[self.index]
+        return value
+
+    def __set__(self, state, value):
+        state.overrides[self.key] = value
+
+
 class SystemState(object):
+    # Seconds to re-use the output of "inxi" for, before it is run again.
+    inxi_cache_ttl = 300
+
+    # Detected in parallel when Welcome starts. See ProbeRegistry.
+    arch = ProbeResult('arch')
+    codename = ProbeResult('codename')
+    session_type = ProbeResult('session')
+    boot_mode = ProbeResult('boot-mode')
+    graphics_vendor = ProbeResult('graphics', 0)
+    graphics_grep = ProbeResult('graphics', 1)
+    welcome_ppa_file = ProbeResult('updates', 0)
+    updates_subscribed = ProbeResult('updates', 1)
+    dpi = ProbeResult('dpi', 0)
+    zoom_level = ProbeResult('dpi', 1)
+
     def __init__(self):
         # Set initial variables
-        self.is_online = False
+        self.overrides = {}
         self.user_name = getuser()
-        self.updates_subscribed = False
         self.welcome_version = 'Unknown'
         self.rpi_resize_pending = False
-
+        self.inxi_stream = None
+
+        # Connectivity is checked in the background, and again whenever it may have changed.
+        self.connectivity = ConnectivityMonitor(arg.net_check_host, arg.net_check_port)
+        self.connectivity.watch_network_monitor()
+        self.connectivity.check()
+
+        # Start the probes. Total time is that of the slowest one.
+        self.probes = ProbeRegistry()
+        self.probes.register('arch', self.probe_arch)
+        self.probes.register('codename', self.probe_codename)
+        self.probes.register('session', self.probe_session)
+        self.probes.register('boot-mode', self.probe_boot_mode, ('arch', 'session'))
+        self.probes.register('graphics', self.probe_graphics, ('session',))
+        self.probes.register('updates', self.probe_updates, ('codename',))
+        self.probes.register('dpi', self.probe_dpi)
+
+    def probe_arch(self):
         # Get current architecture of system.
         # Outputs 'i386', 'amd64', etc - Based on packages instead of kernel (eg. i686, x86_64).
-        self.arch = str(subprocess.Popen(['dpkg','--print-architecture'], stdout=subprocess.PIPE).communicate()[0]).strip('\\nb\'')
+        output = subprocess.Popen(['dpkg','--print-architecture'], stdout=subprocess.PIPE).communicate()[0]
+        return output.decode('utf-8').strip()
 
+    def probe_codename(self):
         # Get current codename of Ubuntu MATE in use.
         # Uses first word in lowercase, such as : trusty, wily, xenial
-        self.codename = platform.dist()[2]
+        return platform.dist()[2]
 
+    def probe_session(self):
         # Determine which type of session we are in.
         if os.path.exists('/usr/share/glib-2.0/schemas/zubuntu-mate-live.gschema.override'):
-            self.session_type = 'live'
+            return 'live'
         elif self.user_name[:6] == 'guest-':
-            self.session_type = 'guest'
+            return 'guest'
         elif os.path.isfile(os.path.join('/','boot/','kernel7.img')):
-            self.session_type = 'pi'
+            return 'pi'
         else:
-            self.session_type = 'normal'
+            return 'normal'
 
+    def probe_boot_mode(self, arch, session_type):
         # To inform the user if they are running in BIOS or UEFI mode.
         if os.path.exists("/sys/firmware/efi"):
-            self.boot_mode = 'UEFI'
-        elif self.session_type == 'pi':
-            self.boot_mode = 'Raspberry Pi'
-        elif self.arch == 'powerpc':
-            self.boot_mode = 'Yaboot'
+            return 'UEFI'
+        elif session_type == 'pi':
+            return 'Raspberry Pi'
+        elif arch == 'powerpc':
+            return 'Yaboot'
         else:
-            self.boot_mode = 'BIOS'
-
-        # Create, then spawn threads
-        thread1 = Thread(target=self.check_internet_connection)
-        thread2 = Thread(target=self.detect_graphics)
-        thread1.start()
-        thread2.start()
+            return 'BIOS'
 
+    def probe_updates(self, codename):
         # Check whether Welcome is subscribed for updates.
-        self.welcome_ppa_file = '/etc/apt/sources.list.d/ubuntu-mate-dev-ubuntu-welcome-' + self.codename + '.list'
-        if os.path.exists(self.welcome_ppa_file):
-            if os.path.getsize(self.welcome_ppa_file) > 0:
-                self.updates_subscribed = True
-
+        ppa_file = '/etc/apt/sources.list.d/ubuntu-mate-dev-ubuntu-welcome-' + codename + '.list'
+        subscribed = False
+        if os.path.exists(ppa_file):
+            if os.path.getsize(ppa_file) > 0:
+                subscribed = True
+        return (ppa_file, subscribed)
+
+    def probe_dpi(self):
         # Accessibility - Enlarge/shrink text based on Font DPI set by the user.
         if arg.font_dpi_override:
             font_dpi = arg.font_dpi_override
@@ -1308,44 +2220,17 @@ class SystemState(object):
         elif font_dpi >= 130:
             zoom_level = 1.5
 
-        self.dpi = font_dpi
-        self.zoom_level = zoom_level
-
-    def check_internet_connection(self):
-        print('[Network Test] Checking for internet connectivity... ')
-        url = "http://pardusarm.com/"
-
-        if arg.simulate_no_connection:
-            print('[Network Test] Simulation argument override. Retrying will reset this.')
-            arg.simulate_no_connection = False
-            self.is_online = False
-            return
-
-        if arg.simulate_force_connection:
-            print('[Network Test] Simulation argument override. Forcing connection presence.')
-            print('[Network Test] WARNING: Do not attempt to install/remove software offline as this may lead to errors later!')
-            arg.simulate_connection = False
-            self.is_online = True
-            return
+        return (font_dpi, zoom_level)
 
-        try:
-            response = urllib.request.urlopen(url, timeout=2).read().decode('utf-8')
-        except socket.timeout:
-            print("[Network Test] -- Socket timed out to URL {0}".format(url))
-            self.is_online = False
-        except:
-            print("[Network Test] -- Could not establish a connection to '{0}'. ".format(url))
-            self.is_online = False
-        else:
-            print("[Network Test] Successfully pinged '{0}' ".format(url))
-            self.is_online = True
+    @property
+    def is_online(self):
+        # Offline until the first check has finished, so nothing waits on the network.
+        return bool(self.connectivity.online)
 
-    def detect_graphics(self):
+    def probe_graphics(self, session_type):
         # If we're the Raspberry Pi, there is nothing to output.
-        if self.session_type == 'pi':
-            self.graphics_grep = 'Raspberry Pi'
-            self.graphics_vendor = 'Raspberry Pi'
-            return
+        if session_type == 'pi':
+            return ('Raspberry Pi', 'Raspberry Pi')
 
         # TODO: Support dual graphic cards.
         arg.print_verbose('Graphics','Detecting graphics vendor... ')
@@ -1359,23 +2244,27 @@ class SystemState(object):
 
         # Scan for and set known brand name.
         if output.find('NVIDIA') != -1:
-            self.graphics_vendor = 'NVIDIA'
+            graphics_vendor = 'NVIDIA'
         elif output.find('AMD') != -1:
-            self.graphics_vendor = 'AMD'
+            graphics_vendor = 'AMD'
         elif output.find('Intel') != -1:
-            self.graphics_vendor = 'Intel'
+            graphics_vendor = 'Intel'
         elif output.find('VirtualBox') != -1:
-            self.graphics_vendor = 'VirtualBox'
+            graphics_vendor = 'VirtualBox'
         else:
-            self.graphics_vendor = 'Unknown'
+            graphics_vendor = 'Unknown'
 
-        self.graphics_grep = repr(output)
-        self.graphics_grep = self.graphics_grep.split("controller: ",1)[1]
-        self.graphics_grep = self.graphics_grep.split("\\n",1)[0]
-        arg.print_verbose("Graphics","Detected: {0}".format(self.graphics_grep))
+        if output.find('controller: ') != -1:
+            graphics_grep = output.split("controller: ",1)[1]
+            graphics_grep = graphics_grep.split("\n",1)[0]
+        else:
+            graphics_grep = 'Unknown'
+        arg.print_verbose("Graphics","Detected: {0}".format(graphics_grep))
+        return (graphics_vendor, graphics_grep)
 
     def get_system_info(self, webkit):
         print('[System Specs] Gathering system specifications...')
+        page = PageState()
 
         # Prefixes for translation
         mb_prefix = _("MB")
@@ -1383,295 +2272,211 @@ class SystemState(object):
         gb_prefix = _("GB")
         gib_prefix = _("GiB")
 
-        # Start collecting advanced system information in the background.
-        # (Python can do other things while this command completes)
-        arg.print_verbose('System Specs', 'Running "inxi" for advanced system information...')
-        try:
-            inxi_raw = subprocess.Popen(['inxi','-c','0','-v','5','-p','-d','-xx'], stdout=subprocess.PIPE)
-        except:
-            print('[System Specs] Failed to execute collect advanced information. Is "inxi" no longer installed?')
+        def format_size(size_bytes):
+            ''' Show megabytes/mebibytes if gigabytes are too small. '''
+            size_GB = round(size_bytes/1000/1000/1000,1)
+            if size_GB <= 1:
+                size_xb = str(round(size_bytes/1000/1000,1)) + ' ' + mb_prefix
+                size_xib = str(round(size_bytes/1024/1024,1)) + ' ' + mib_prefix
+            else:
+                size_xb = str(size_GB) + ' ' + gb_prefix
+                size_xib = str(round(size_bytes/1024/1024/1024,1)) + ' ' + gib_prefix
+            return size_xb + ' <span class=\'secondary-value\'>(' + size_xib + ')</span>'
 
         # Append a failure symbol beforehand in event something goes horribly wrong.
         stat_error_msg = _("Could not gather data.")
         html_tag = '<a data-toggle=\'tooltip\' data-placement=\'top\' title=\'' + stat_error_msg + '\'><span class=\'fa fa-warning specs-error\'></span></a>'
         for element in ['distro', 'kernel', 'motherboard', 'boot-mode', 'cpu-model', 'cpu-speed', 'arch-use',
                         'arch-supported', 'memory', 'graphics', 'filesystem', 'capacity', 'allocated-space', 'free-space']:
-            webkit.execute_script('$("#spec-' + element + '").html("' + html_tag + '")')
+            page.html('#spec-' + element, html_tag)
 
-        # Collect basic system information
-        def run_external_command(command, with_shell=False):
-            if with_shell:
-                raw = str(subprocess.Popen(command, stdout=subprocess.PIPE, shell=True).communicate()[0])
-            else:
-                raw = str(subprocess.Popen(command, stdout=subprocess.PIPE).communicate()[0])
-            output = raw.replace("b'","").replace('b"',"").replace("\\n'","").replace("\\n","")
-            return output
+        # Collect basic system information, reusing whatever is still valid from last time.
+        collector = SystemInfoCollector()
+        info = collector.collect(JsonCache('system-info.json'))
 
         ## Distro
-        try:
-            arg.print_verbose('System Specs', 'Gathering data: Distribution')
-            distro_description = run_external_command(['lsb_release','-d','-s'])
-            distro_codename = run_external_command(['lsb_release','-c','-s'])
-            webkit.execute_script('$("#spec-distro").html("' + distro_description + '")')
-        except:
+        if info['distro']:
+            page.html('#spec-distro', info['distro'])
+        else:
             print('[System Specs] Failed to retrieve data: Distribution')
 
         ## Kernel
-        try:
-            arg.print_verbose('System Specs', 'Gathering data: Kernel')
-            kernel = run_external_command(['uname','-r'])
-            webkit.execute_script('$("#spec-kernel").html("' + kernel + '")')
-        except:
-            print('[System Specs] Failed to retrieve data: Kernel')
+        page.html('#spec-kernel', info['kernel'])
 
         ## Motherboard
-        try:
-            arg.print_verbose('System Specs', 'Gathering data: Motherboard')
-            motherboard_name = run_external_command(['cat','/sys/devices/virtual/dmi/id/board_name'])
-            webkit.execute_script('$("#spec-motherboard").html("' + motherboard_name + '")')
-        except:
+        if info['motherboard']:
+            page.html('#spec-motherboard', info['motherboard'])
+        else:
             print('[System Specs] Failed to retrieve data: Motherboard')
 
         ## CPU Details
-        arg.print_verbose('System Specs', 'Gathering data: CPU')
-        try:
-            cpu_model = run_external_command(['lscpu | grep "name"'], True).split(': ')[1]
-            webkit.execute_script('$("#spec-cpu-model").html("' + cpu_model + '")')
-        except:
+        if info['cpu_model']:
+            page.html('#spec-cpu-model', info['cpu_model'])
+        else:
             print('[System Specs] Failed to retrieve data: CPU Model')
 
-        try:
-            try:
-                # Try obtaining the maximum speed first.
-                cpu_speed = int(run_external_command(['lscpu | grep "max"'], True).split(': ')[1].strip(' ').split('.')[0])
-            except:
-                # Otherwise, fetch the CPU's MHz.
-                cpu_speed = int(run_external_command(['lscpu | grep "CPU MHz"'], True).split(': ')[1].strip(' ').split('.')[0])
-
-            webkit.execute_script('$("#spec-cpu-speed").html("' + str(cpu_speed) + ' MHz")')
-        except:
+        if info['cpu_speed']:
+            page.html('#spec-cpu-speed', str(info['cpu_speed']) + ' MHz')
+        else:
             print('[System Specs] Failed to retrieve data: CPU Speed')
 
-        try:
-            if self.arch == 'i386':
-                cpu_arch_used = '32-bit'
-            elif self.arch == 'amd64':
-                cpu_arch_used = '64-bit'
-            else:
-                cpu_arch_used = self.arch
-            webkit.execute_script('$("#spec-arch-use").html("' + cpu_arch_used + '")')
-        except:
-            print('[System Specs] Failed to retrieve data: CPU Arch in Use')
-
-        try:
-            cpu_arch_supported = run_external_command(['lscpu | grep "mode"'], True).split(': ')[1]
-            webkit.execute_script('$("#spec-arch-supported").html("' + cpu_arch_supported + '")')
-        except:
-            print('[System Specs] Failed to retrieve data: CPU Supported Arch')
+        if self.arch == 'i386':
+            cpu_arch_used = '32-bit'
+        elif self.arch == 'amd64':
+            cpu_arch_used = '64-bit'
+        else:
+            cpu_arch_used = self.arch
+        page.html('#spec-arch-use', cpu_arch_used)
+        page.html('#spec-arch-supported', info['cpu_op_modes'])
 
         ## Root partition (where Ubuntu MATE is installed) and the rest of that disk.
-        try:
-            if self.session_type == 'live':
-                webkit.execute_script('$(".specs-hide-live-session").hide()')
-            else:
-                arg.print_verbose('System Specs', 'Gathering data: Storage')
-                ## Gather entire disk data
-                root_partition = run_external_command(['mount | grep "on / "'], True).split(' ')[0]
-                if root_partition[:-2] == "/dev/sd":            # /dev/sdXY
-                    root_dev = root_partition[:-1]
-                if root_partition[:-2] == "/dev/hd":            # /dev/hdXY
-                    root_dev = root_partition[:-1]
-                if root_partition[:-3] == "/dev/mmcblk":        # /dev/mmcblkXpY
-                    root_dev = root_partition[:-2]
-                else:
-                    root_dev = root_partition[:-1]              # Generic
-                disk_dev_name = root_dev.split('/')[2]
-                arg.print_verbose('System Specs', 'Ubuntu MATE is installed on disk: ' + root_dev)
-                rootfs = os.statvfs('/')
-                root_size = rootfs.f_blocks * rootfs.f_frsize
-                root_free = rootfs.f_bavail * rootfs.f_frsize
-                root_used = root_size - root_free
-                entire_disk = run_external_command(['lsblk -b | grep "' + disk_dev_name + '" | grep "disk"'], True)
-                entire_disk = int(entire_disk.split()[3])
-
-                ## Perform calculations across units
-                capacity_GB =   round(entire_disk/1000/1000/1000,1)
-                capacity_GiB =  round(entire_disk/1024/1024/1024,1)
-                allocated_GB =  round(root_size/1000/1000/1000,1)
-                allocated_GiB = round(root_size/1024/1024/1024,1)
-                used_GB =       round(root_used/1000/1000/1000,1)
-                used_GiB =      round(root_used/1024/1024/1024,1)
-                free_GB =       round(root_free/1000/1000/1000,1)
-                free_GiB =      round(root_free/1024/1024/1024,1)
-                other_GB =      round((entire_disk-root_size)/1000/1000/1000,1)
-                other_GiB =     round((entire_disk-root_size)/1024/1024/1024,1)
-
-                # Show megabytes/mebibytes (in red) if gigabytes are too small.
-                if capacity_GB <= 1:
-                    capacity_GB = str(round(entire_disk/1000/1000,1)) + ' ' + mb_prefix
-                    capacity_GiB = str(round(entire_disk/1024/1024,1)) + ' ' + mib_prefix
-                else:
-                    capacity_GB = str(capacity_GB) + ' ' + gb_prefix
-                    capacity_GiB = str(capacity_GiB) + ' ' + gib_prefix
-
-                if allocated_GB <= 1:
-                    allocated_GB =  str(round(root_size/1000/1000,1)) + ' ' + mb_prefix
-                    allocated_GiB = str(round(root_size/1024/1024,1)) + ' ' + mib_prefix
-                else:
-                    allocated_GB = str(allocated_GB) + ' ' + gb_prefix
-                    allocated_GiB = str(allocated_GiB) + ' ' + gib_prefix
-
-                if used_GB <= 1:
-                    used_GB =  str(round(root_used/1000/1000,1)) + ' ' + mb_prefix
-                    used_GiB = str(round(root_used/1024/1024,1)) + ' ' + mib_prefix
-                else:
-                    used_GB = str(used_GB) + ' ' + gb_prefix
-                    used_GiB = str(used_GiB) + ' ' + gib_prefix
-
-                if free_GB <= 1:
-                    free_GB =  str(round(root_free/1000/1000,1)) + ' ' + mb_prefix
-                    free_GiB = str(round(root_free/1024/1024,1)) + ' ' + mib_prefix
-                    webkit.execute_script('$("#spec-free-space").addClass("specs-error")')
-                else:
-                    free_GB = str(free_GB) + ' ' + gb_prefix
-                    free_GiB = str(free_GiB) + ' ' + gib_prefix
-
-                if other_GB <= 1:
-                    other_GB =  str(round((entire_disk-root_size)/1000/1000,1)) + ' ' + mb_prefix
-                    other_GiB = str(round((entire_disk-root_size)/1024/1024,1)) + ' ' + mib_prefix
-                else:
-                    other_GB = str(other_GB) + ' ' + gb_prefix
-                    other_GiB = str(other_GiB) + ' ' + gib_prefix
-
-                ## Append data to HTML.
-                webkit.execute_script('$("#spec-filesystem").html("' + root_partition + '")')
-                webkit.execute_script('$("#spec-capacity").html("' + capacity_GB + ' <span class=\'secondary-value\'>(' + capacity_GiB + ')</span>")')
-                webkit.execute_script('$("#spec-allocated-space").html("' + allocated_GB + ' <span class=\'secondary-value\'>(' + allocated_GiB + ')</span>")')
-                webkit.execute_script('$("#spec-used-space").html("' + used_GB + ' <span class=\'secondary-value\'>(' + used_GiB + ')</span>")')
-                webkit.execute_script('$("#spec-free-space").html("' + free_GB + ' <span class=\'secondary-value\'>(' + free_GiB + ')</span>")')
-                webkit.execute_script('$("#spec-other-space").html("' + other_GB + ' <span class=\'secondary-value\'>(' + other_GiB + ')</span>")')
-
-                ## Calculate representation across physical disk
-                disk_percent_UM_used = int(round(root_used / entire_disk * 100)) * 2
-                disk_percent_UM_free = int(round(root_free / entire_disk * 100)) * 2
-                disk_percent_other   = (200 - disk_percent_UM_used - disk_percent_UM_free)
-                arg.print_verbose('System Specs', ' --- Disk: ' + root_dev)
-                arg.print_verbose('System Specs', ' --- * OS Used: ' + str(root_used) + ' bytes (' + str(disk_percent_UM_used/2) + '%)')
-                arg.print_verbose('System Specs', ' --- * OS Free: ' + str(root_free) + ' bytes (' + str(disk_percent_UM_free/2) + '%)')
-                arg.print_verbose('System Specs', ' --- = Other Partitions: ' + str(entire_disk - root_size) + ' bytes (' + str(disk_percent_other/2) + '%)')
-                webkit.execute_script("$('#disk-used').width('" + str(disk_percent_UM_used) + "px');")
-                webkit.execute_script("$('#disk-free').width('" + str(disk_percent_UM_free) + "px');")
-                webkit.execute_script("$('#disk-other').width('" + str(disk_percent_other) + "px');")
-        except:
+        if self.session_type == 'live':
+            page.hide('.specs-hide-live-session')
+        elif not info['disk_size'] or not info['root_size']:
             print('[System Specs] Failed to retrieve data: Storage')
+        else:
+            entire_disk = info['disk_size']
+            root_size = info['root_size']
+            root_free = info['root_free']
+            root_used = root_size - root_free
+            arg.print_verbose('System Specs', 'Ubuntu MATE is installed on disk: /dev/' + info['disk'])
+
+            if round(root_free/1000/1000/1000,1) <= 1:
+                page.jq('#spec-free-space', 'addClass', 'specs-error')
+
+            ## Append data to HTML.
+            page.html('#spec-filesystem', info['root_partition'])
+            page.html('#spec-capacity', format_size(entire_disk))
+            page.html('#spec-allocated-space', format_size(root_size))
+            page.html('#spec-used-space', format_size(root_used))
+            page.html('#spec-free-space', format_size(root_free))
+            page.html('#spec-other-space', format_size(entire_disk - root_size))
+
+            ## Calculate representation across physical disk
+            disk_percent_UM_used = int(round(root_used / entire_disk * 100)) * 2
+            disk_percent_UM_free = int(round(root_free / entire_disk * 100)) * 2
+            disk_percent_other   = (200 - disk_percent_UM_used - disk_percent_UM_free)
+            arg.print_verbose('System Specs', ' --- Disk: /dev/' + info['disk'])
+            arg.print_verbose('System Specs', ' --- * OS Used: ' + str(root_used) + ' bytes (' + str(disk_percent_UM_used/2) + '%)')
+            arg.print_verbose('System Specs', ' --- * OS Free: ' + str(root_free) + ' bytes (' + str(disk_percent_UM_free/2) + '%)')
+            arg.print_verbose('System Specs', ' --- = Other Partitions: ' + str(entire_disk - root_size) + ' bytes (' + str(disk_percent_other/2) + '%)')
+            page.jq('#disk-used', 'width', str(disk_percent_UM_used) + 'px')
+            page.jq('#disk-free', 'width', str(disk_percent_UM_free) + 'px')
+            page.jq('#disk-other', 'width', str(disk_percent_other) + 'px')
 
         ## RAM
-        try:
-            arg.print_verbose('System Specs', 'Gathering Data: RAM')
-            ram_bytes = run_external_command(['free -b | grep "Mem:" '], True)
-            ram_bytes = float(ram_bytes.split()[1])
+        if info['memory']:
+            ram_bytes = info['memory']
             if round(ram_bytes / 1024 / 1024) < 1024:
                 ram_xb = str(round(ram_bytes / 1000 / 1000, 1)) + ' ' + mb_prefix
                 ram_xib = str(round(ram_bytes / 1024 / 1024, 1)) + ' ' + mib_prefix
             else:
                 ram_xb =  str(round(ram_bytes / 1000 / 1000 / 1000, 1)) + ' ' + gb_prefix
                 ram_xib = str(round(ram_bytes / 1024 / 1024 / 1024, 1)) + ' ' + gib_prefix
-            ram_string = ram_xb + ' <span class=\'secondary-value\'>(' + ram_xib + ')</span>'
-            webkit.execute_script('$("#spec-memory").html("' + ram_string + '")')
-        except:
+            page.html('#spec-memory', ram_xb + ' <span class=\'secondary-value\'>(' + ram_xib + ')</span>')
+        else:
             print('[System Specs] Failed to retrieve data: RAM (Memory)')
 
         ## Graphics
-        webkit.execute_script('$("#spec-graphics").html("' + self.graphics_grep + '")')
+        page.html('#spec-graphics', self.graphics_grep)
 
         ## Collect missing data differently for some architectures.
-        if systemstate.arch == 'powerpc':
-            ## Motherboard & Revision
-            try:
-                arg.print_verbose('System Specs', 'Gathering alternate data: PowerPC Motherboard')
-                mb_model = run_external_command(['grep','motherboard','/proc/cpuinfo']).split(': ')[1]
-                mb_rev = run_external_command(['grep','revision','/proc/cpuinfo']).split(': ')[1]
-                webkit.execute_script('$("#spec-motherboard").html("' + mb_model + ' ' + mb_rev + '")')
-            except:
-                arg.print_verbose('System Specs', 'Failed to gather data: PowerPC Motherboard')
-
-            ## CPU and Clock Speed
-            try:
-                arg.print_verbose('System Specs', 'Gathering alternate data: PowerPC CPU')
-                cpu_model = run_external_command(['grep','cpu','/proc/cpuinfo']).split(': ')[1]
-                cpu_speed = run_external_command(['grep','clock','/proc/cpuinfo']).split(': ')[1]
-                webkit.execute_script('$("#spec-cpu-model").html("' + cpu_model + '")')
-                webkit.execute_script('$("#spec-cpu-speed").html("' + str(cpu_speed) + '")')
-            except:
-                arg.print_verbose('System Specs', 'Failed to gather data: PowerPC CPU')
-
-            ## Device Name
-            try:
-                arg.print_verbose('System Specs', 'Gathering alternate data: PowerPC Model Name')
-                mb_name = run_external_command(['grep','detected','/proc/cpuinfo']).split(': ')[1]
-                webkit.execute_script('$("#spec-motherboard").append(" / ' + mb_name + '")')
-            except:
-                arg.print_verbose('System Specs', 'Failed to gather data: PowerPC Model Name')
-
-            ## Boot Mode / PowerMac Generation
-            try:
-                arg.print_verbose('System Specs', 'Gathering alternate data: PowerMac Generation')
-                mac_generation = run_external_command(['grep','pmac-generation','/proc/cpuinfo']).split(': ')[1]
-                webkit.execute_script('$("#spec-boot-mode").html("Yaboot (' + mac_generation + ')")')
-            except:
-                arg.print_verbose('System Specs', 'Failed to gather data: PowerMac Generation')
-
-        # Append advanced system information
-        try:
-            arg.print_verbose('System Specs', 'Waiting for inxi process to finish...')
-            inxi_output = str(inxi_raw.communicate()[0])
-            inxi_output = inxi_output.replace("b'","").replace("\\n","\n")
-            webkit.execute_script("$('#specs-inxi').html('')")
-            for line in inxi_output.split('\n'):
-                webkit.execute_script("$('#specs-inxi').append('" + line.strip('"').strip("'") + "<br>')")
-            print('[System Specs] Successfully appended advanced system information.')
-        except:
-            print('[System Specs] Failed to append advanced system information or communicate with "inxi" process.')
+        if self.arch == 'powerpc':
+            powerpc = info['powerpc']
+            if 'motherboard' in powerpc and 'revision' in powerpc:
+                page.html('#spec-motherboard', powerpc['motherboard'] + ' ' + powerpc['revision'])
+            if 'cpu' in powerpc and 'clock' in powerpc:
+                page.html('#spec-cpu-model', powerpc['cpu'])
+                page.html('#spec-cpu-speed', powerpc['clock'])
+            if 'detected as' in powerpc:
+                page.append('#spec-motherboard', ' / ' + powerpc['detected as'])
+            if 'pmac-generation' in powerpc:
+                page.html('#spec-boot-mode', 'Yaboot (' + powerpc['pmac-generation'] + ')')
+
+        # Advanced system information is streamed in the background by "inxi".
+        page.html('#specs-inxi', '')
 
         # Check internet connectivity status.
-        if self.is_online:
-            webkit.execute_script('$("#specs-has-net").show()')
-            webkit.execute_script('$("#specs-has-no-net").hide()')
-        else:
-            webkit.execute_script('$("#specs-has-net").hide()')
-            webkit.execute_script('$("#specs-has-no-net").show()')
+        page.visible('#specs-has-net', self.is_online)
+        page.visible('#specs-has-no-net', not self.is_online)
 
         # Change icon depending on what type of device we are using.
         if self.session_type == 'pi':
-            webkit.execute_script('$("#specs-device-rpi").show()')
-            webkit.execute_script('$(".specs-hide-pi").hide()')
+            page.show('#specs-device-rpi')
+            page.hide('.specs-hide-pi')
         elif self.arch == 'powerpc':
-            webkit.execute_script('$("#specs-device-powerpc").show()')
-            webkit.execute_script('$(".specs-hide-ppc").hide()')
+            page.show('#specs-device-powerpc')
+            page.hide('.specs-hide-ppc')
         elif self.graphics_vendor == 'VirtualBox':
-            webkit.execute_script('$("#specs-device-vbox").show()')
-            webkit.execute_script('$(".specs-hide-vbox").hide()')
+            page.show('#specs-device-vbox')
+            page.hide('.specs-hide-vbox')
         elif self.session_type == 'live':
-            webkit.execute_script('$("#specs-live-session").show()')
-            webkit.execute_script('$(".specs-hide-live").hide()')
+            page.show('#specs-live-session')
+            page.hide('.specs-hide-live')
         else:
-            webkit.execute_script('$("#specs-device-normal").show()')
+            page.show('#specs-device-normal')
 
         # Display UEFI/BIOS boot mode.
-        if systemstate.arch == 'i386' or systemstate.arch == 'amd64':
-            webkit.execute_script('$("#spec-boot-mode").html("' + self.boot_mode + '")')
+        if self.arch == 'i386' or self.arch == 'amd64':
+            page.html('#spec-boot-mode', self.boot_mode)
 
         # Hide root storage info if in a live session.
         if self.session_type == 'live':
-            webkit.execute_script('$(".spec-3").hide()')
+            page.hide('.spec-3')
 
         # Data cached, ready to display.
-        webkit.execute_script('$("#specs-loading").fadeOut("fast")')
-        webkit.execute_script('$("#specs-tabs").fadeIn("fast")')
-        webkit.execute_script('$("#specs-basic").fadeIn("medium")')
-        webkit.execute_script('setCursorNormal()')
+        page.jq('#specs-loading', 'fadeOut', 'fast')
+        page.jq('#specs-tabs', 'fadeIn', 'fast')
+        page.jq('#specs-basic', 'fadeIn', 'medium')
+        page.call('setCursorNormal')
+        page.apply(webkit)
+
+        self.stream_inxi(webkit, collector.read_boot_id())
+
+    def stream_inxi(self, webkit, boot_id=None):
+        ''' Append advanced system information to the page as "inxi" produces it.
+            The output is re-used for 'inxi_cache_ttl' seconds during this boot, as
+            it also includes readings such as uptime, memory in use and temperatures. '''
+        self.stop_inxi()
+        inxi_cache = JsonCache('inxi.json')
+        all_lines = []
+
+        def append_lines(lines):
+            all_lines.extend(lines)
+            page = PageState()
+            text = '<br>'.join(line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;') for line in lines)
+            page.append('#specs-inxi', text + '<br>')
+            page.apply(webkit)
+
+        def finished(status):
+            self.inxi_stream = None
+            if status == 'done':
+                print('[System Specs] Successfully appended advanced system information.')
+                if boot_id:
+                    inxi_cache.save([boot_id], {'time': time.time(), 'lines': all_lines})
+            elif status == 'timeout':
+                print('[System Specs] Gave up waiting for "inxi" after ' + str(arg.inxi_timeout) + ' seconds.')
+
+        cached = inxi_cache.load([boot_id]) if boot_id else None
+        if isinstance(cached, dict) and 0 <= time.time() - cached.get('time', 0) < self.inxi_cache_ttl:
+            arg.print_verbose('System Specs', 'Using cached data: inxi')
+            append_lines(cached['lines'])
+            return
+
+        arg.print_verbose('System Specs', 'Running "inxi" for advanced system information...')
+        self.inxi_stream = CommandStream(['inxi','-c','0','-v','5','-p','-d','-xx'], append_lines, finished, arg.inxi_timeout)
+        if not self.inxi_stream.start():
+            self.inxi_stream = None
+            print('[System Specs] Failed to execute collect advanced information. Is "inxi" no longer installed?')
 
-    def rpi_resize(self, action, webkit=None):
+    def stop_inxi(self):
+        if self.inxi_stream:
+            arg.print_verbose('System Specs', 'Stopping "inxi" as the page is no longer shown.')
+            self.inxi_stream.cancel()
+
+    def rpi_resize(self, action, webkit=None, page=None):
+        ''' 'check' queues its changes on 'page', the PageState being built
+            for the Raspberry Pi page. 'do-resize' updates 'webkit' directly. '''
         if action == 'do-resize':
             subprocess.call(['pkexec', '/usr/lib/ubuntu-mate/ubuntu-mate-welcome-rpi2-partition-resize'])
 
@@ -1695,9 +2500,11 @@ class SystemState(object):
             if status_code == 1:
                 notify( _("Root partition has been resized."), _("The filesystem will be enlarged upon the next reboot."), 'dialog-information' )
                 self.rpi_resize_pending = True
-                webkit.execute_script('$("#rpi-resized").hide()')
-                webkit.execute_script('$("#rpi-not-resized").hide()')
-                webkit.execute_script('$("#rpi-restart-now").show()')
+                page = PageState()
+                page.hide('#rpi-resized')
+                page.hide('#rpi-not-resized')
+                page.show('#rpi-restart-now')
+                page.apply(webkit)
             elif status_code == 2:
                 notify( _("Don't know how to expand."), misc_text + ' ' + _("does not exist or is not a symlink."), 'dialog-error' )
             elif status_code == 3:
@@ -1718,44 +2525,210 @@ class SystemState(object):
             else:
                 resized = False
 
-            if resized:
-                webkit.execute_script('$("#rpi-resized").show()')
-                webkit.execute_script('$("#rpi-not-resized").hide()')
-            else:
-                webkit.execute_script('$("#rpi-resized").hide()')
-                webkit.execute_script('$("#rpi-not-resized").show()')
+            page.visible('#rpi-resized', resized)
+            page.visible('#rpi-not-resized', not resized)
 
             if self.rpi_resize_pending:
-                webkit.execute_script('$("#rpi-resized").hide()')
-                webkit.execute_script('$("#rpi-not-resized").hide()')
-                webkit.execute_script('$("#rpi-restart-now").show()')
+                page.hide('#rpi-resized')
+                page.hide('#rpi-not-resized')
+                page.show('#rpi-restart-now')
 
         elif action == 'reboot':
             subprocess.call(['mate-session-save','--shutdown-dialog'])
 
 
+class AppRecord(object):
+    ''' An application from the index, parsed once when the index is loaded.
+        See the JSON Structure in the `DynamicApps` class for the fields. '''
+
+    __slots__ = ['program_id', 'category', 'css_class', 'name', 'img', 'main_package',
+                 'launch_command', 'upgrade_only', 'install_packages', 'remove_packages',
+                 'upgrade_packages', 'description', 'alternate_to', 'subcategory',
+                 'css_subcategory', 'open_source', 'url_info', 'url_android', 'url_ios',
+                 'arch', 'arch_list', 'releases', 'working', 'pre_install', 'methods']
+
+    def __init__(self, category, program_id, entry):
+        def split_list(value, separator=','):
+            if not value:
+                return ()
+            return tuple(item for item in value.split(separator) if item)
+
+        self.program_id = program_id
+        self.category = category
+
+        # CSS breaks with dots (.), so any must become hyphens (-).
+        self.css_class = program_id.replace('.','-')
+
+        self.name = entry['name']
+        self.img = entry['img']
+        self.main_package = entry['main-package']
+        self.launch_command = entry.get('launch-command')
+        self.upgrade_only = bool(entry.get('upgradable', False))
+        self.install_packages = split_list(entry.get('install-packages'))
+        self.remove_packages = split_list(entry.get('remove-packages'))
+        self.upgrade_packages = split_list(entry.get('upgrade-packages'))
+
+        description = entry['description']
+        if isinstance(description, list):
+            description = ' '.join(description)
+        self.description = description
+
+        self.alternate_to = entry.get('alternate-to')
+        self.subcategory = entry['subcategory']
+        self.css_subcategory = self.subcategory.replace(' ','-')
+        self.open_source = entry['open-source']
+        self.url_info = entry.get('url-info')
+        self.url_android = entry.get('url-android')
+        self.url_ios = entry.get('url-ios')
+
+        # Order of architectures is kept for listing the supported platforms.
+        self.arch_list = split_list(entry['arch'])
+        self.arch = frozenset(self.arch_list)
+        self.releases = frozenset(split_list(entry['releases']))
+        self.working = entry['working']
+
+        # Methods stay in order, as they are performed one after another.
+        self.pre_install = entry.get('pre-install', {})
+        self.methods = {}
+        for target in self.pre_install:
+            self.methods[target] = split_list(self.pre_install[target].get('method'), '+')
+
+    def get_target(self, codename):
+        ''' Pre-configuration to use for a release: its own, otherwise "all". '''
+        if codename in self.pre_install:
+            return codename
+        return 'all'
+
+    def is_supported(self, arch, codename):
+        return arch in self.arch and codename in self.releases
+
+    def get_packages(self, action):
+        if action == 'install':
+            return self.install_packages
+        elif action == 'remove':
+            return self.remove_packages
+        elif action == 'upgrade':
+            return self.upgrade_packages
+        return ()
+
+
+class SearchIndex(object):
+    ''' Finds applications by the words in their name, description, "alternate-to" and
+        subcategory, using a map of word -> program IDs built once for the index. '''
+
+    # Increase whenever words are split or folded differently, so cached copies are replaced.
+    search_format = 1
+
+    # Turkish letters without a decomposed form, plus those that have one, so
+    # "ş", "s" and "Ş" all match the same word regardless of the keyboard used.
+    folding = str.maketrans({'ı': 'i', 'İ': 'i', 'ş': 's', 'Ş': 's', 'ğ': 'g', 'Ğ': 'g',
+                             'ç': 'c', 'Ç': 'c', 'ö': 'o', 'Ö': 'o', 'ü': 'u', 'Ü': 'u'})
+
+    def __init__(self, tokens=None):
+        # tokens = word -> [program_id, ...]
+        self.tokens = tokens or {}
+        self._words = sorted(self.tokens)
+
+    @classmethod
+    def fold(cls, text):
+        ''' Lower case, without accents. Descriptions may contain HTML. '''
+        text = html.unescape(re.sub('<[^>]*>', ' ', text))
+        text = unicodedata.normalize('NFKD', text.translate(cls.folding).lower())
+        return ''.join(char for char in text if not unicodedata.combining(char))
+
+    @classmethod
+    def tokenize(cls, text):
+        return re.findall(r'\w+', cls.fold(text))
+
+    @classmethod
+    def build(cls, apps):
+        tokens = {}
+        for program_id in sorted(apps):
+            record = apps[program_id]
+            fields = [record.name, record.description, record.alternate_to or '', record.subcategory]
+            for word in set(cls.tokenize(' '.join(fields))):
+                tokens.setdefault(word, []).append(program_id)
+        return cls(tokens)
+
+    def search(self, query):
+        ''' Returns the program IDs matching every word of the query.
+            The last word may be incomplete, as the query is searched while typed. '''
+        words = self.tokenize(query)
+        if not words:
+            return []
+
+        matches = None
+        for position, word in enumerate(words):
+            found = set(self.tokens.get(word, ()))
+            if position == len(words) - 1:
+                start = bisect.bisect_left(self._words, word)
+                for candidate in self._words[start:]:
+                    if not candidate.startswith(word):
+                        break
+                    found.update(self.tokens[candidate])
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return sorted(matches)
+
+
 class DynamicApps(object):
-    def __init__(self):
-        # Load JSON Index into Memory
-        self.reload_index()
+    # Increase whenever the rendered catalogue markup changes, so cached copies are replaced.
+    catalogue_format = 5
+
+    # Icons shown on the Boutique's featured grid (see initGrid in welcome.js).
+    featured_grid_size = 16
 
+    # Height of the screenshots listed in an app's details (see .screenshot in welcome.css).
+    screenshot_height = 100
+
+    def __init__(self):
         # Variables to remember common details.
         self.all_categories = ['Accessories', 'Education', 'Games', 'Graphics', 'Internet', 'Office', 'Programming', 'Media', 'SysTools', 'UnivAccess', 'Servers', 'MoreApps']
-        self.hide_non_free = False
 
-        # Reading the apt cache later.
-        self._apt_cache = apt.Cache()
+        # Load JSON Index into Memory
+        self.reload_index()
+
+        # Rendered Boutique markup, kept between visits and launches.
+        self._catalogue = None
+        self._catalogue_key = None
+        self._catalogue_cache = JsonCache('catalogue.json')
+        self.screenshots_path = os.path.join(app._data_path, 'img', 'applications', 'screenshots')
+        self._screenshots = None
+        self._screenshots_key = None
+        self.thumbnails = Thumbnails()
 
         # Indicate that operations are in progress.
         self.operations_busy = False
+        self.queue = SoftwareQueue()
+
+        # Whether each application is shown as installed on the current page, if known.
+        self.shown_state = {}
 
         # Get the version of Welcome in use.
-        for pkgname in self._apt_cache.keys():
-            if 'ubuntu-mate-welcome' in pkgname:
-                systemstate.welcome_version = "v3.17"
-                break
+        systemstate.welcome_version = self.get_welcome_version()
         print('[Welcome] Version: ' + systemstate.welcome_version)
 
+    def get_welcome_version(self):
+        ''' Remembered in the configuration directory until dpkg's status changes,
+            so the package cache does not need to be opened on every start. '''
+        memo = JsonCache('version.json', app._appView._config._config_dir)
+        try:
+            key = [os.path.getmtime(dpkgstatus.path)]
+        except OSError:
+            key = [None]
+
+        version = memo.load(key)
+        if version:
+            return version
+
+        if 'ubuntu-mate-welcome' in aptcache.cache:
+            version = "v3.17"
+        else:
+            version = 'Unknown'
+        memo.save(key, version)
+        return version
+
 
     ###### JSON Index Structure
     #
@@ -1844,46 +2817,172 @@ class DynamicApps(object):
             print(str(e))
             print("------------------------------------------------------------")
 
-    def set_app_info(self, category, program_id):
-        self.app_name = self.index[category][program_id]['name']
-        self.app_img = self.index[category][program_id]['img']
-        self.app_main_package = self.index[category][program_id]['main-package']
-        self.app_launch_command = self.index[category][program_id]['launch-command']
-        self.app_upgrade_only = False
+        # Look up applications directly instead of searching every category.
+        #   css_lookup       = css_class  -> program_id
+        #   apps             = program_id -> AppRecord
+        #   apps_by_category = category   -> [AppRecord, ...] sorted by program_id
+        self.css_lookup = {}
+        self.apps = {}
+        self.apps_by_category = {}
+        if self.index:
+            for category in self.index:
+                records = []
+                for program_id in sorted(self.index[category].keys()):
+                    entry = self.index[category][program_id]
+                    try:
+                        record = AppRecord(category, program_id, entry)
+                    except Exception as e:
+                        print('[Apps] WARNING: Skipping invalid entry "' + program_id + '": ' + str(e))
+                        continue
+                    self.css_lookup[record.css_class] = program_id
+                    self.apps[program_id] = record
+                    records.append(record)
+                self.apps_by_category[category] = records
+
+        # Icons that may be featured, for each architecture.
+        #   featured_by_arch = arch -> [img, ...]
+        self.featured_by_arch = {}
+        for category in self.all_categories:
+            for record in self.apps_by_category.get(category, []):
+                for arch in record.arch_list:
+                    featured = self.featured_by_arch.setdefault(arch, [])
+                    if record.img not in featured:
+                        featured.append(record.img)
+
+        # Filtering by subcategory is done by the page's style sheet. Each subcategory is
+        # numbered, and a class on <body> (see applyFilter in welcome.js) picks the rule.
+        self.filter_buckets = {}
+        filter_rules = ['.hide-non-free .app-entry.proprietary { display: none; }']
+        for number, css_subcategory in enumerate(sorted(set(record.css_subcategory for record in self.apps.values()))):
+            self.filter_buckets[css_subcategory] = number
+            filter_rules.append('.app-filter-%d .app-entry:not([class~="filter-%s"]) { display: none; }' % (number, css_subcategory))
+        self.filter_rules = '\n'.join(filter_rules)
+
+        # Words to search for, rebuilt only when the index changes.
+        self.search_index = SearchIndex()
+        if self.index:
+            cache = JsonCache('search.json')
+            key = [SearchIndex.search_format, os.path.getmtime(json_path)]
+            tokens = cache.load(key)
+            if tokens:
+                self.search_index = SearchIndex(tokens)
+            else:
+                self.search_index = SearchIndex.build(self.apps)
+                cache.save(key, self.search_index.tokens)
+
+    def catalogue_cache_key(self):
+        ''' Rendered markup depends on the index, the system and the language in use,
+            including when its translations were last built. '''
+        json_path = os.path.abspath(os.path.join(app._data_path, 'js/applications.json'))
+        if arg.locale is not None:
+            locale_in_use = arg.locale
+        else:
+            locale_in_use = str(locale.getlocale()[0])
+        # "Upgrade" apps are rendered differently once their source list exists.
         try:
-            if self.index[category][program_id]['upgradable']:
-                self.app_upgrade_only = True
-                self.app_upgrade_packages = self.index[category][program_id]['upgrade-packages']
-        except:
-            self.app_upgrade_only = False
-
-        if not self.app_upgrade_only:
-            self.app_install_packages = self.index[category][program_id]['install-packages']
-            self.app_remove_packages = self.index[category][program_id]['remove-packages']
-        self.app_description = ''
-        for line in self.index[category][program_id]['description']:
-            self.app_description = self.app_description + ' ' + line
-        self.app_alternate_to = self.index[category][program_id]['alternate-to']
-        self.app_subcategory = self.index[category][program_id]['subcategory']
-        self.app_open_source = self.index[category][program_id]['open-source']
-        self.app_url_info = self.index[category][program_id]['url-info']
-        self.app_url_android = self.index[category][program_id]['url-android']
-        self.app_url_ios = self.index[category][program_id]['url-ios']
-        self.app_arch = self.index[category][program_id]['arch']
-        self.app_releases = self.index[category][program_id]['releases']
-        self.app_working = self.index[category][program_id]['working']
-
-    def populate_categories(self, webkit):
+            sources_mtime = os.path.getmtime(os.path.join('/', 'etc', 'apt', 'sources.list.d'))
+        except OSError:
+            sources_mtime = 0
+        try:
+            screenshots_mtime = os.path.getmtime(self.screenshots_path)
+        except OSError:
+            screenshots_mtime = 0
+        return [self.catalogue_format, os.path.getmtime(json_path), systemstate.arch, systemstate.codename, locale_in_use,
+                translations_mtime(arg.locale), sources_mtime, screenshots_mtime]
+
+    def populate_categories(self, page):
         ''' List all of the applications supported on the current architecture. '''
-        total_added = 0
-        total_skipped = 0
-        total_unsupported = 0
 
         # Don't attempt to continue if the index is missing/incorrectly parsed.
         if not self.index:
             print('[Apps] ERROR: Application index not loaded. Cannot populate categories.')
             return
 
+        # Re-use the catalogue from a previous visit or launch if nothing changed.
+        key = self.catalogue_cache_key()
+        if not self._catalogue or self._catalogue_key != key:
+            self._catalogue = self._catalogue_cache.load(key)
+            if self._catalogue:
+                arg.print_verbose('Apps', 'Using cached catalogue.')
+            else:
+                self._catalogue = self.render_catalogue()
+                self._catalogue_cache.save(key, self._catalogue)
+            self._catalogue_key = key
+
+        for category in self.all_categories:
+            page.append('#' + category, self._catalogue[category]['apps'])
+            page.append('#Filter-' + category, self._catalogue[category]['filters'])
+            for program_id in self._catalogue[category]['program_ids']:
+                self.shown_state[program_id] = False
+        page.hide('.app-entry [id^=info-hide-]')
+        page.call('initAppFilter', self.filter_rules, self.filter_buckets)
+
+        # Colour the architecture currently in use.
+        page.jq('.' + systemstate.arch, 'addClass', 'arch-in-use')
+
+    def get_screenshots(self):
+        ''' Screenshots for each app, as img -> [filename, ...] in order.
+            The directory is only listed again once its contents change. '''
+        try:
+            key = [os.path.getmtime(self.screenshots_path)]
+        except OSError:
+            return {}
+        if self._screenshots_key == key:
+            return self._screenshots
+
+        cache = JsonCache('screenshots.json')
+        screenshots = cache.load(key)
+        if screenshots is not None:
+            self._screenshots = screenshots
+            self._screenshots_key = key
+            return screenshots
+
+        numbered = {}
+        for filename in os.listdir(self.screenshots_path):
+            match = re.match(r'(.+)-(\d+)\.jpg$', filename)
+            if match:
+                numbered.setdefault(match.group(1), []).append((int(match.group(2)), filename))
+
+        screenshots = {}
+        for img in numbered:
+            screenshots[img] = [filename for number, filename in sorted(numbered[img])]
+        cache.save(key, screenshots)
+        self._screenshots = screenshots
+        self._screenshots_key = key
+        return screenshots
+
+    def show_screenshots(self, webkit, css_class, page):
+        ''' Screenshots are only decoded once an app's details are shown, and then as
+            small copies. The full size image is only opened by ScreenshotWindow.
+            Copies that are ready are shown with the rest of 'page', others once made. '''
+        program_id = self.get_program_id_for_css_class(css_class)
+        if not program_id:
+            return
+
+        def set_source(page, name, path):
+            selector = '#details-' + css_class + ' [data-screenshot="' + name + '"]'
+            page.jq(selector, 'attr', 'src', Gio.File.new_for_path(path).get_uri())
+
+        def made(name, path):
+            later = PageState()
+            set_source(later, name, path)
+            later.apply(webkit)
+
+        for filename in self.get_screenshots().get(self.apps[program_id].img, []):
+            name = os.path.splitext(filename)[0]
+            thumbnail = self.thumbnails.get(os.path.join(self.screenshots_path, filename), self.screenshot_height,
+                                            lambda path, name=name: made(name, path))
+            if thumbnail:
+                set_source(page, name, thumbnail)
+
+    def render_catalogue(self):
+        ''' Build the markup for every category in one pass.
+            Returns a dictionary of categories with 'apps' and 'filters' HTML. '''
+        catalogue = {}
+        total_added = 0
+        total_skipped = 0
+        total_unsupported = 0
+
         # Strings
         str_nothing_here = _("Sorry, Welcome could not feature any software for this category that is compatible on this system.")
         str_upgraded = _("This application is set to receive the latest updates.")
@@ -1906,150 +3005,127 @@ class DynamicApps(object):
         str_source_partner = '<img src="img/logos/ubuntu-mono.png" width="16px" height="16px"/>&nbsp;' + _('Canonical Partner Repository')
         str_source_skip = '<img src="img/logos/ubuntu-mono.png" width="16px" height="16px"/>&nbsp;' + _('Ubuntu Repository')
         str_unknown = _('Unknown')
+        str_open_source = _('Open Source')
+        str_proprietary = _('Proprietary')
+
+        platform_strings = {
+            'i386':    '<span class="i386"><span class="i386 fa fa-laptop"></span> 32-bit</span> &nbsp;&nbsp;',
+            'amd64':   '<span class="amd64"><span class="fa fa-laptop"></span> 64-bit</span> &nbsp;&nbsp;',
+            'armhf':   '<span class="armhf"><span class="fa fa-tv"></span> aarch32 (ARMv7)</span> &nbsp;&nbsp;',
+            'powerpc': '<span class="powerpc"><span class="fa fa-desktop"></span> PowerPC</span> &nbsp;&nbsp;'
+        }
+
+        screenshots = self.get_screenshots()
 
         # Get the app data from each category and list them.
         for category in self.all_categories:
             arg.print_verbose('Apps', ' ------ Processing: ' + category + ' ------')
 
-            # Convert to a list to work with. Sort alphabetically.
-            category_items = list(self.index[category].keys())
-            category_items.sort()
-
             # Keep a count of apps in case there are none to list.
             apps_here = 0
 
             # Keep track of the subcategories of the apps in this category so we can filter them.
             subcategories = []
+            category_html = []
+            listed = []
 
-            # Enumerate each program in this category.
-            for program_id in category_items:
-                self.set_app_info(category, program_id)
+            # Enumerate each program in this category, already sorted alphabetically.
+            for record in self.apps_by_category.get(category, []):
+                program_id = record.program_id
+                css_class = record.css_class
 
                 # Only list the program if it's working.
-                if not self.app_working:
-                    arg.print_verbose('Apps', ' Unlisted: ' + self.app_name)
+                if not record.working:
+                    arg.print_verbose('Apps', ' Unlisted: ' + record.name)
                     total_skipped = total_skipped + 1
                     continue
 
-                # Only list the program if it supports the current architecture in use.
-                supported = False
-                supported_arch = False
-                supported_release = False
-
-                for architecture in self.app_arch.split(','):
-                    if architecture == systemstate.arch:
-                        supported_arch = True
-
-                # Only list the program if it's available for the current release.
-                for release in self.app_releases.split(','):
-                    if release == systemstate.codename:
-                        supported_release = True
-
-                if supported_arch and supported_release:
-                    supported = True
-
-                if not supported:
-                    arg.print_verbose('Apps', ' Unsupported: ' + self.app_name + ' (Only for architectures: ' + self.app_arch + ' and releases: ' + self.app_releases + ')' )
+                # Only list the program if it supports the current architecture and release in use.
+                if not record.is_supported(systemstate.arch, systemstate.codename):
+                    arg.print_verbose('Apps', ' Unsupported: ' + record.name + ' (Only for architectures: ' + ','.join(record.arch_list) + ' and releases: ' + ','.join(sorted(record.releases)) + ')' )
                     total_unsupported = total_unsupported + 1
                     continue
 
                 # If the app has made it this far, it can be added to the grid.
-                # CSS breaks with dots (.), so any must become hyphens (-).
-                arg.print_verbose('Apps', ' Added: ' + self.app_name)
-                subcategories.append(self.app_subcategory)
-                html_buffer = ''
-                css_class = program_id.replace('.','-')
-                css_subcategory = self.app_subcategory.replace(' ','-')
+                arg.print_verbose('Apps', ' Added: ' + record.name)
+                subcategories.append(record.subcategory)
+                html = []
+
+                # Cards are rendered as "not installed". See update_app_status.
+                listed.append(program_id)
 
                 # "Normal" packages that can be installed/removed by the user.
-                if self.app_open_source:
-                    html_buffer = html_buffer + '<div id="' + css_class + '" class="app-entry filter-' + css_subcategory + '">'
+                if record.open_source:
+                    html.append('<div id="' + css_class + '" class="app-entry filter-' + record.css_subcategory + '">')
                 else:
-                    html_buffer = html_buffer + '<div id="' + css_class + '" class="app-entry filter-' + css_subcategory + ' proprietary">'
-                html_buffer = html_buffer + '<div class="row-fluid">'
-                html_buffer = html_buffer + '<div class="span2 center-inside">'
-                html_buffer = html_buffer + '<img src="img/applications/' + self.app_img + '.png">'
-                html_buffer = html_buffer + '<span class="fa fa-check-circle fa-2x installed-check ' + css_class + '-remove"></span>'
-                html_buffer = html_buffer + '</div><div class="span10">'
-                html_buffer = html_buffer + '<p><b class="' + css_class + '-text">' + self.app_name + '</b></p>'
-                html_buffer = html_buffer + '<p class="' + css_class + '-text">' + self.app_description + '</p>'
+                    html.append('<div id="' + css_class + '" class="app-entry filter-' + record.css_subcategory + ' proprietary">')
+                html.append('<div class="row-fluid">')
+                html.append('<div class="span2 center-inside">')
+                html.append('<img src="img/applications/' + record.img + '.png">')
+                html.append('<span hidden class="fa fa-check-circle fa-2x installed-check ' + css_class + '-remove"></span>')
+                html.append('</div><div class="span10">')
+                html.append('<p><b class="' + css_class + '-text">' + record.name + '</b></p>')
+                html.append('<p class="' + css_class + '-text">' + record.description + '</p>')
 
                 # Check any "Upgrade" packages if the PPA has already been added.
                 upgraded = False
-                if self.app_upgrade_only:
+                if record.upgrade_only:
                     try:
-                        listname = dynamicapps.index[category][program_id]['pre-install']['all']['source-file']
+                        listname = record.pre_install['all']['source-file']
                         listname = listname.replace('OSVERSION',preinstallation.os_version).replace('CODENAME',preinstallation.codename)
                         if os.path.exists(os.path.join('/', 'etc', 'apt', 'sources.list.d', listname+'.list')):
                             upgraded = True
-                            html_buffer = html_buffer + '<h5 class="' + css_class + '-text"><span class="fa fa-check-circle"></span> ' + str_upgraded + '</h5>'
+                            html.append('<h5 class="' + css_class + '-text"><span class="fa fa-check-circle"></span> ' + str_upgraded + '</h5>')
                     except:
                         pass
 
-                if not self.app_alternate_to == None:
-                    html_buffer = html_buffer + '<ul><li class="' + css_class + '-text"><b>' + str_alternate_to + ' </b><i>' + self.app_alternate_to + '</i></li></ul>'
-                html_buffer = html_buffer + '<p class="text-right">'
-                html_buffer = html_buffer + '<a id="info-show-' + css_class + '" class="btn" href="cmd://app-info-show?' + css_class + '"><span class="fa fa-chevron-down"></span> ' + str_show + '</a>&nbsp;'
-                html_buffer = html_buffer + '<a hidden id="info-hide-' + css_class + '" class="btn" href="cmd://app-info-hide?' + css_class + '"><span class="fa fa-chevron-up"></span> ' + str_hide + '</a>&nbsp;'
+                if not record.alternate_to == None:
+                    html.append('<ul><li class="' + css_class + '-text"><b>' + str_alternate_to + ' </b><i>' + record.alternate_to + '</i></li></ul>')
+                html.append('<p class="text-right">')
+                html.append('<a id="info-show-' + css_class + '" class="btn" href="cmd://app-info-show?' + css_class + '"><span class="fa fa-chevron-down"></span> ' + str_show + '</a>&nbsp;')
+                html.append('<a hidden id="info-hide-' + css_class + '" class="btn" href="cmd://app-info-hide?' + css_class + '"><span class="fa fa-chevron-up"></span> ' + str_hide + '</a>&nbsp;')
 
                 # "Regular" packages - can be installed or removed with one-click by the user.
-                if not self.app_upgrade_only:
-                    html_buffer = html_buffer + '<span class="' + css_class + '-applying"> <span class="' + css_class + '-applying-status"></span> &nbsp;<img src="img/welcome/processing.gif" width="24px" height="24px"/></span>'
-                    html_buffer = html_buffer + '<a class="' + css_class + '-install btn btn-success" href="cmd://install-appid?' + program_id + '"><span class="fa fa-download"></span>&nbsp; ' + str_install + '</a>&nbsp;'
-                    html_buffer = html_buffer + '<a class="' + css_class + '-reinstall btn btn-warning" href="cmd://install-appid?' + program_id + '" data-toggle="tooltip" data-placement="top" title="' + str_reinstall + '"><span class="fa fa-refresh"></span></a>&nbsp;'
-                    html_buffer = html_buffer + '<a class="' + css_class + '-remove btn btn-danger" href="cmd://remove-appid?' + program_id + '" data-toggle="tooltip" data-placement="top" title="' + str_remove + '"><span class="fa fa-trash"></span></a>&nbsp;'
+                if not record.upgrade_only:
+                    html.append('<span hidden class="' + css_class + '-applying"> <span class="' + css_class + '-applying-status"></span> &nbsp;<img src="img/welcome/processing.gif" width="24px" height="24px"/></span>')
+                    html.append('<a class="' + css_class + '-install btn btn-success" href="cmd://install-appid?' + program_id + '"><span class="fa fa-download"></span>&nbsp; ' + str_install + '</a>&nbsp;')
+                    html.append('<a hidden class="' + css_class + '-reinstall btn btn-warning" href="cmd://install-appid?' + program_id + '" data-toggle="tooltip" data-placement="top" title="' + str_reinstall + '"><span class="fa fa-refresh"></span></a>&nbsp;')
+                    html.append('<a hidden class="' + css_class + '-remove btn btn-danger" href="cmd://remove-appid?' + program_id + '" data-toggle="tooltip" data-placement="top" title="' + str_remove + '"><span class="fa fa-trash"></span></a>&nbsp;')
 
                 # "Upgradable" packages - usually pre-installed but have a more up-to-date repository.
-                if self.app_upgrade_only:
-                    arg.print_verbose('Apps', 'Upgrade: ' + self.app_name)
+                if record.upgrade_only:
+                    arg.print_verbose('Apps', 'Upgrade: ' + record.name)
                     if not upgraded:
-                        html_buffer = html_buffer + '<a class="' + css_class + '-upgrade btn btn-warning" href="cmd://upgrade-appid?' + program_id + '"><span class="fa fa-level-up"></span>&nbsp; ' + str_upgrade + '</a>&nbsp;'
+                        html.append('<a hidden class="' + css_class + '-upgrade btn btn-warning" href="cmd://upgrade-appid?' + program_id + '"><span class="fa fa-level-up"></span>&nbsp; ' + str_upgrade + '</a>&nbsp;')
 
-                if not self.app_launch_command == None:
-                    html_buffer = html_buffer + '<a class="' + css_class + '-launch btn btn-inverse" href="cmd://launch-appid?' + program_id + '"><img src="img/applications/' + self.app_img + '.png" width="20px" height="20px" />&nbsp; ' + str_launch + '</a>&nbsp;'
+                if not record.launch_command == None:
+                    html.append('<a hidden class="' + css_class + '-launch btn btn-inverse" href="cmd://launch-appid?' + program_id + '"><img src="img/applications/' + record.img + '.png" width="20px" height="20px" />&nbsp; ' + str_launch + '</a>&nbsp;')
 
                 # More details section.
-                html_buffer = html_buffer + '</p><div hidden id="details-' + css_class + '">'
+                html.append('</p><div hidden id="details-' + css_class + '">')
 
                 ## Determine string for license
-                if self.app_open_source:
-                    license_string = _('Open Source')
+                if record.open_source:
+                    license_string = str_open_source
                 else:
-                    license_string = _('Proprietary')
+                    license_string = str_proprietary
 
                 ## Determine supported platforms
-                platform_string = ''
-                for arch in self.app_arch.split(','):
-                    if arch == 'i386':
-                        platform_string = platform_string + '<span class="i386"><span class="i386 fa fa-laptop"></span> 32-bit</span> &nbsp;&nbsp;'
-                    elif arch =='amd64':
-                        platform_string = platform_string + '<span class="amd64"><span class="fa fa-laptop"></span> 64-bit</span> &nbsp;&nbsp;'
-                    elif arch =='armhf':
-                        platform_string = platform_string + '<span class="armhf"><span class="fa fa-tv"></span> aarch32 (ARMv7)</span> &nbsp;&nbsp;'
-                    elif arch =='powerpc':
-                        platform_string = platform_string + '<span class="powerpc"><span class="fa fa-desktop"></span> PowerPC</span> &nbsp;&nbsp;'
+                platform_string = ''.join([platform_strings[arch] for arch in record.arch_list if arch in platform_strings])
 
                 ## Add Android / iOS app links if necessary.
-                if not self.app_url_android == None:
-                    platform_string = platform_string + '<a href="cmd://link?' + self.app_url_android + '"><span class="fa fa-android"></span> Android</a> &nbsp;&nbsp;'
+                if not record.url_android == None:
+                    platform_string = platform_string + '<a href="cmd://link?' + record.url_android + '"><span class="fa fa-android"></span> Android</a> &nbsp;&nbsp;'
 
-                if not self.app_url_ios == None:
-                    platform_string = platform_string + '<a href="cmd://link?' + self.app_url_ios + '"><span class="fa fa-apple"></span> iOS</a> &nbsp;&nbsp;'
+                if not record.url_ios == None:
+                    platform_string = platform_string + '<a href="cmd://link?' + record.url_ios + '"><span class="fa fa-apple"></span> iOS</a> &nbsp;&nbsp;'
 
                 ## Add details about the source of this file.
                 try:
-                    preinstall = dynamicapps.index[category][program_id]['pre-install']
-                    codenames = list(preinstall.keys())
-                    target = None
-                    for name in codenames:
-                        if name == systemstate.codename:
-                            target = name
-                            break
-                    if not target:
-                            target = 'all'
-
-                    methods = preinstall[target]['method'].split('+')
-                    self.source_info = []
+                    target = record.get_target(systemstate.codename)
+                    preinstall = record.pre_install[target]
+                    methods = record.methods[target]
+                    source_info = []
                     if len(methods) > 1:
                         multiple_sources = True
                     else:
@@ -2057,74 +3133,66 @@ class DynamicApps(object):
 
                     for method in methods:
                         if method == 'skip':
-                            self.source_info.insert(0, str_source_skip)
+                            source_info.insert(0, str_source_skip)
 
                         elif method == 'partner-repo':
-                            self.source_info.insert(0, str_source_partner)
+                            source_info.insert(0, str_source_partner)
 
                         elif method == 'ppa':
-                            ppa = preinstall[target]['enable-ppa']
+                            ppa = preinstall['enable-ppa']
                             ppa_author = ppa.split(':')[1].split('/')[0]
                             ppa_archive = ppa.split(':')[1].split('/')[1]
-                            self.source_info.insert(0, str_source_ppa + ' <a href="cmd://link?https://launchpad.net/~' + ppa_author + '/+archive/ubuntu/' + ppa_archive + '">' + ppa + '</a>')
+                            source_info.insert(0, str_source_ppa + ' <a href="cmd://link?https://launchpad.net/~' + ppa_author + '/+archive/ubuntu/' + ppa_archive + '">' + ppa + '</a>')
 
                         elif method == 'manual':
-                            apt_source = ''.join(preinstall[target]['apt-sources'])
+                            apt_source = ''.join(preinstall['apt-sources'])
                             manual_text = str_source_manual + ' ' + str_unknown
                             for substring in apt_source.split(' '):
                                 if substring[:4] == 'http':
                                     apt_source = substring.replace('OSVERSION',preinstallation.os_version).replace('CODENAME',preinstallation.codename)
                                     manual_text = str_source_manual + ' ' + apt_source
                                     break
-                            self.source_info.insert(0, manual_text)
+                            source_info.insert(0, manual_text)
 
                 except:
                     print('[Apps] WARNING: Error occurred while processing pre-configuration! Skipped Source: ' + program_id)
-                    self.source_info = [str_unknown]
+                    multiple_sources = False
+                    source_info = [str_unknown]
 
                 ## Write contents of the table.
-                html_buffer = html_buffer + '<table class="more-details table table-striped">'
-                html_buffer = html_buffer + '<tr><th>' + str_license + '</th><td>' + license_string + '</td></tr>'
-                html_buffer = html_buffer + '<tr><th>' + str_platform + '</th><td>' + platform_string + '</td></tr>'
-                html_buffer = html_buffer + '<tr><th>' + str_category + '</th><td>' + self.app_subcategory + '</td></tr>'
+                html.append('<table class="more-details table table-striped">')
+                html.append('<tr><th>' + str_license + '</th><td>' + license_string + '</td></tr>')
+                html.append('<tr><th>' + str_platform + '</th><td>' + platform_string + '</td></tr>')
+                html.append('<tr><th>' + str_category + '</th><td>' + record.subcategory + '</td></tr>')
 
                 ## Add a website URL if there is one.
-                if self.app_url_info:
-                    html_buffer = html_buffer + '<tr><th>' + str_website + '</th><td><a href="cmd://link?' + self.app_url_info + '">' + self.app_url_info + '</a></td></tr>'
+                if record.url_info:
+                    html.append('<tr><th>' + str_website + '</th><td><a href="cmd://link?' + record.url_info + '">' + record.url_info + '</a></td></tr>')
 
                 ## Add the source for this application.
                 if multiple_sources:
-                    html_buffer = html_buffer + '<tr><th>' + str_source + '</th><td><ul>'
-                    for item in self.source_info:
-                        html_buffer = html_buffer + '<li>' + item + '</li>'
-                    html_buffer = html_buffer + '</td></tr></ul>'
+                    html.append('<tr><th>' + str_source + '</th><td><ul>')
+                    for item in source_info:
+                        html.append('<li>' + item + '</li>')
+                    html.append('</td></tr></ul>')
                 else:
-                    html_buffer = html_buffer + '<tr><th>' + str_source + '</th><td>' + self.source_info[0] + '</td></tr>'
+                    html.append('<tr><th>' + str_source + '</th><td>' + source_info[0] + '</td></tr>')
 
                 ## Add a screenshot if there is any.
                 ## Images should be labelled the same as 'img' and increment starting at 1.
-                screenshots = 1
-                screenshots_end = False
-                screenshot_buffer = ''
-                while not screenshots_end:
-                    screenshot_path = os.path.join(app._data_path + 'img/applications/screenshots/' + self.app_img + '-' + str(screenshots) + '.jpg')
-                    if os.path.exists(screenshot_path):
-                        screenshot_buffer = screenshot_buffer + '<a class="screenshot-link" href="cmd://screenshot?' + self.app_img + '-' + str(screenshots) + '"><img src="' + screenshot_path + '" class="screenshot"/></a>'
-                        screenshots = screenshots + 1
-                    else:
-                        screenshots_end = True
-
-                if not screenshots == 1:
-                    html_buffer = html_buffer + '<tr><th>' + str_screenshot + '</th><td>' + screenshot_buffer + '</td></tr>'
+                if record.img in screenshots:
+                    html.append('<tr><th>' + str_screenshot + '</th><td>')
+                    for filename in screenshots[record.img]:
+                        html.append('<a class="screenshot-link" href="cmd://screenshot?' + os.path.splitext(filename)[0] + '"><img data-screenshot="' + os.path.splitext(filename)[0] + '" class="screenshot"/></a>')
+                    html.append('</td></tr>')
 
-                html_buffer = html_buffer + '</table>'
+                html.append('</table>')
 
                 # End the div's for this application.
-                html_buffer = html_buffer + '</div><br><hr class="soften"></div></div></div>'
+                html.append('</div><br><hr class="soften"></div></div></div>')
 
-                # Append buffer to page
-                webkit.execute_script('$("#' + category + '").append(\'' + html_buffer + '\')')
-                webkit.execute_script('$("#info-hide-' + css_class + '").hide()')
+                # Add this application to the category.
+                category_html.append(''.join(html))
 
                 # Keep track of how many apps added.
                 apps_here = apps_here + 1
@@ -2132,18 +3200,17 @@ class DynamicApps(object):
 
             # Display a message if there is nothing for this category.
             if apps_here == 0:
-                webkit.execute_script('$("#' + category + '").append("<p class=\'center\'><span class=\'fa fa-warning\'></span>&nbsp; ' + str_nothing_here + '</p>")')
-
-            # Post actions to page
-            ## Colour the architecture currently in use.
-            webkit.execute_script('$(".' + systemstate.arch + '").addClass("arch-in-use")')
+                category_html.append('<p class="center"><span class="fa fa-warning"></span>&nbsp; ' + str_nothing_here + '</p>')
 
             # Process filters for this category.
             filters = list(set(subcategories))
             filters.sort()
+            filter_html = []
             for string in filters:
                 css_subcategory = string.replace(' ','-')
-                webkit.execute_script('$("#Filter-' + category + '").append(\'<option value="' + css_subcategory + '">' + string + '</option>\')')
+                filter_html.append('<option value="' + css_subcategory + '">' + string + '</option>')
+
+            catalogue[category] = {'apps': ''.join(category_html), 'filters': ''.join(filter_html), 'program_ids': listed}
 
         # "Stats for nerds"
         total_apps = total_added + total_skipped + total_unsupported
@@ -2153,99 +3220,92 @@ class DynamicApps(object):
         arg.print_verbose('Apps','Applications that are broken or not suitable for inclusion: ' + str(total_skipped))
         arg.print_verbose('Apps','Total number of applications: ' + str(total_apps))
         arg.print_verbose('Apps','------------------')
+        return catalogue
 
-    def populate_featured_apps(self, webkit):
+    def populate_featured_apps(self, page):
         arg.print_verbose('Apps', '---- Populating Featured Apps Grid ----')
-        # Randomly generate a list of apps to feature if supported on this architecture.
-        possible_apps = []
-        for category in self.all_categories:
-            category_items = list(self.index[category].keys())
-            for program_id in category_items:
-                if systemstate.arch in self.index[category][program_id]['arch']:
-                    possible_apps.append(self.index[category][program_id]['img'])
-
-        random.shuffle(possible_apps)
-        for no in range(0,17):
-            arg.print_verbose('Apps', str(no) + '. ' + possible_apps[no])
-            webkit.execute_script("addToGrid('" + possible_apps[no] + "');")
-        webkit.execute_script("initGrid();")
+        # Randomly pick icons of apps supported on this architecture, with a
+        # reservoir sample so the eligible list is read once and never copied.
+        rng = random.Random(arg.featured_seed)
+        featured = []
+        for position, img in enumerate(self.featured_by_arch.get(systemstate.arch, [])):
+            if position < self.featured_grid_size:
+                featured.append(img)
+            else:
+                slot = rng.randint(0, position)
+                if slot < self.featured_grid_size:
+                    featured[slot] = img
+
+        # The first icons are kept in index order until replaced, so mix the grid.
+        rng.shuffle(featured)
+        for no, img in enumerate(featured):
+            arg.print_verbose('Apps', str(no) + '. ' + img)
+        page.call('initGrid', featured)
         arg.print_verbose('Apps','------------------')
 
-    def modify_app(self, webkit, action, program_id):
-        ''' Installs, removes or upgrades an application. '''
-        # Indicate changes are in progress.
-        css_class = program_id.replace('.','-')
-        webkit.execute_script("$('." + css_class + "-applying').show();")
-        webkit.execute_script("$('." + css_class + "-launch').hide();")
-        webkit.execute_script("$('." + css_class + "-install').hide();")
-        webkit.execute_script("$('." + css_class + "-reinstall').hide();")
-        webkit.execute_script("$('." + css_class + "-remove').hide();")
-        webkit.execute_script("$('." + css_class + "-upgrade').hide();")
-        webkit.execute_script("$('." + css_class + "-text').css('color','#000');")
-
-        # Text to display when applying changes.
-        install_text = _("Installing...")
-        remove_text = _("Removing...")
-        upgrade_text = _("Upgrading...")
-
-        # Asynchronous apt process
-        if action == 'install':
-            webkit.execute_script("$('." + css_class + "-applying-status').html('" + install_text + "');")
-            preinstallation.process_packages(program_id, 'install')
-        elif action == 'remove':
-            webkit.execute_script("$('." + css_class + "-applying-status').html('" + remove_text + "');")
-            preinstallation.process_packages(program_id, 'remove')
-        elif action == 'upgrade':
-            webkit.execute_script("$('." + css_class + "-applying-status').html('" + upgrade_text + "');")
-            preinstallation.process_packages(program_id, 'upgrade')
-        else:
-            print('[Apps] An unknown action was requested.')
-
-        # Refresh the page to reflect changes (if any).
-        self._apt_cache.close()
-        self._apt_cache = apt.Cache()
-        self.update_app_status(webkit, program_id)
-
-    def update_app_status(self, webkit, program_id):
-        ''' Update the web page for an individual application. '''
+    def modify_app(self, webkit, action, program_id, on_finished=None):
+        ''' Queues an application to be installed, removed or upgraded.
+            'on_finished(success)' is called once the change is over. '''
+        self.queue.add(webkit, action, program_id, on_finished)
+
+    def search_apps(self, webkit, query):
+        ''' Show only the applications matching the query, across every category.
+            Only applications listed in the catalogue have a card to show. '''
+        matches = []
+        for program_id in self.search_index.search(query):
+            record = self.apps[program_id]
+            if record.working and record.is_supported(systemstate.arch, systemstate.codename):
+                matches.append(record.css_class)
+        arg.print_verbose('Apps', 'Search "' + query + '": ' + str(len(matches)) + ' matches')
+        page = PageState()
+        page.call('showSearchResults', query, matches)
+        page.apply(webkit)
+
+    def update_app_status(self, webkit, program_id, page=None):
+        ''' Update the web page for an individual application.
+            If a PageState is given, changes are queued on it instead. '''
 
         # Don't attempt to continue if the index is missing/incorrectly parsed.
         if not self.index:
             print('[Apps] ERROR: Application index not loaded. Cannot update application status.')
             return
 
+        # Applications waiting for changes keep showing their progress.
+        if program_id in self.queue.status:
+            self.queue.webkit = webkit
+            self.queue.set_status(program_id, self.queue.status[program_id], page)
+            return
+
         # Check whether the application is installed or not.
-        main_package = self.get_attribute_for_app(program_id, 'main-package')
-        try:
-            if self._apt_cache[main_package].is_installed:
-                this_installed = True
-                arg.print_verbose('Apps', '  Installed: ' + main_package)
-            else:
-                this_installed = False
-                arg.print_verbose('Apps', 'Not present: ' + main_package)
-        except:
-            this_installed = False
+        main_package = self.apps[program_id].main_package
+        this_installed = dpkgstatus.is_installed(main_package)
+        if this_installed:
+            arg.print_verbose('Apps', '  Installed: ' + main_package)
+        else:
             arg.print_verbose('Apps', 'Not present: ' + main_package)
 
+        # Only change cards that show something else.
+        if program_id in self.shown_state and self.shown_state[program_id] == this_installed:
+            return
+        self.shown_state[program_id] = this_installed
+
         # Replace any dots with dashes, as they are unsupported in CSS.
         css_class = program_id.replace('.','-')
 
         # Update appearance on this page.
-        webkit.execute_script("$('." + css_class + "-applying').hide();")
-        if this_installed:
-            webkit.execute_script("$('." + css_class + "-launch').show();")
-            webkit.execute_script("$('." + css_class + "-install').hide();")
-            webkit.execute_script("$('." + css_class + "-reinstall').show();")
-            webkit.execute_script("$('." + css_class + "-remove').show();")
-            webkit.execute_script("$('." + css_class + "-upgrade').show();")
-        else:
-            webkit.execute_script("$('." + css_class + "-launch').hide();")
-            webkit.execute_script("$('." + css_class + "-install').show();")
-            webkit.execute_script("$('." + css_class + "-reinstall').hide();")
-            webkit.execute_script("$('." + css_class + "-remove').hide();")
-            webkit.execute_script("$('." + css_class + "-upgrade').hide();")
-
-    def update_all_app_status(self, webkit):
+        apply_now = page is None
+        if apply_now:
+            page = PageState()
+        page.hide('.' + css_class + '-applying')
+        page.visible('.' + css_class + '-launch', this_installed)
+        page.visible('.' + css_class + '-install', not this_installed)
+        page.visible('.' + css_class + '-reinstall', this_installed)
+        page.visible('.' + css_class + '-remove', this_installed)
+        page.visible('.' + css_class + '-upgrade', this_installed)
+        if apply_now:
+            page.apply(webkit)
+
+    def update_all_app_status(self, webkit, page=None):
         ''' Update the webpage whether all indexed applications are installed or not. '''
 
         # Don't attempt to continue if the index is missing/incorrectly parsed.
@@ -2255,34 +3315,28 @@ class DynamicApps(object):
 
         # Enumerate each program and check each one from the index.
         arg.print_verbose('Apps', '---- Checking cache for installed applications ----')
+        apply_now = page is None
+        if apply_now:
+            page = PageState()
         for category in self.all_categories:
-            category_items = list(self.index[category].keys())
-            for program_id in category_items:
-                main_package = self.index[category][program_id]['main-package']
-                # Only check if it's supported on this architecture.
-                if systemstate.arch in self.index[category][program_id]['arch']:
-                    self.update_app_status(webkit, program_id)
-                else:
-                    continue
+            for record in self.apps_by_category.get(category, []):
+                # Only check if it's listed on this system.
+                if record.working and record.is_supported(systemstate.arch, systemstate.codename):
+                    self.update_app_status(webkit, record.program_id, page)
 
+        if apply_now:
+            page.apply(webkit)
         arg.print_verbose('Apps', '----------------------------------------')
 
-    def get_attribute_for_app(self, requested_id, attribute):
-        ''' Retrieves a specific attribute from a listed application,
-            without specifying its category. '''
-        for category in list(self.index.keys()):
-            category_items = list(self.index[category].keys())
-            for program_id in category_items:
-                if program_id == requested_id:
-                    if not attribute == 'category':
-                        return self.index[category][program_id][attribute]
-                    else:
-                        return category
+    def get_program_id_for_css_class(self, css_class):
+        ''' Reverse of program_id.replace('.','-') used for page element names. '''
+        return self.css_lookup.get(css_class)
 
     def launch_app(self, appid):
         ''' Launch an application directly from Welcome '''
-        program_name = self.get_attribute_for_app(appid, 'name')
-        program_command = self.get_attribute_for_app(appid, 'launch-command')
+        record = self.apps[appid]
+        program_name = record.name
+        program_command = record.launch_command
         print('[Apps] Launched "' + program_name + '" (Command: "' + program_command + '").')
         try:
             subprocess.Popen(program_command.split(' '))
@@ -2300,46 +3354,6 @@ class DynamicApps(object):
                          '--window-icon=error',
                          '--timeout=15'])
 
-    def apply_filter(self, webkit, filter_value, nonfree_toggle=False):
-        sub_css_class = 'filter-' + filter_value
-
-        # Toggle visibility of non-free software.
-        if nonfree_toggle:
-            if self.hide_non_free:
-                self.hide_non_free = False
-                webkit.execute_script('$("#nonFreeCheckBox").addClass("fa-square");')
-                webkit.execute_script('$("#nonFreeCheckBox").removeClass("fa-check-square");')
-            else:
-                self.hide_non_free = True
-                webkit.execute_script('$("#nonFreeCheckBox").removeClass("fa-square");')
-                webkit.execute_script('$("#nonFreeCheckBox").addClass("fa-check-square");')
-
-        if filter_value == 'none':
-            arg.print_verbose('Apps','Filter reset.')
-            webkit.execute_script('$(".app-entry").show();')
-            if self.hide_non_free:
-                arg.print_verbose('Apps','Hiding all proprietary software.')
-                webkit.execute_script('$(".proprietary").hide();')
-            return
-        else:
-            arg.print_verbose('Apps','Applying filter: ' + filter_value)
-            webkit.execute_script('$(".app-entry").hide();')
-
-            for category in self.all_categories:
-                category_items = list(self.index[category].keys())
-                for program_id in category_items:
-                    app_subcategory = self.index[category][program_id]['subcategory'].replace(' ','-')
-                    app_open_source = self.index[category][program_id]['open-source']
-
-                    # If the application is closed source and we're told to hide it.
-                    if not app_open_source and self.hide_non_free:
-                        webkit.execute_script('$("#' + program_id.replace('.','-') + '").hide();')
-                        continue
-
-                    # Only show if subcategory matches.
-                    if app_subcategory.replace(' ','-') == filter_value:
-                        webkit.execute_script('$("#' + program_id.replace('.','-') + '").show();')
-
     def show_screenshot(self, filename):
         ssw = ScreenshotWindow(filename)
 
@@ -2353,7 +3367,7 @@ class ScreenshotWindow(Gtk.Window):
         # Strings for this child window.
         title_string = 'Preview Screenshot'
         close_string = 'Close'
-        path = app._data_path + '/img/applications/screenshots/' + filename + '.jpg'
+        path = os.path.join(dynamicapps.screenshots_path, filename + '.jpg')
 
         # Build a basic pop up window containing the screenshot at its full dimensions.
         Gtk.Window.__init__(self, title=title_string)
@@ -2391,6 +3405,10 @@ class Arguments(object):
         self.locale = None
         self.jump_to = None
         self.font_dpi_override = None
+        self.inxi_timeout = 30
+        self.featured_seed = None
+        self.net_check_host = 'pardusarm.com'
+        self.net_check_port = 80
 
         for arg in sys.argv:
           if arg == '--help':
@@ -2405,11 +3423,14 @@ class Arguments(object):
               print('                                 Examples: "trusty", "wily" or "xenial"')
               print('  --force-no-net              Simulate no internet connection.')
               print('  --force-net                 Simulate a working internet connection.')
+              print('  --net-check=<HOST[:PORT]>   Server used to check for an internet connection.')
               print('  --software-only             Open Welcome only for the software selections.')
               print('  --simulate-changes          Simulate software package changes without modifying the system.')
               print('  --locale=<LOCALE>           Locale to use e.g. fr_FR.')
               print('  --jump-to=<page>            Open a specific page, excluding html extension.')
               print('  --font-dpi=<number>         Override the font size by specifying a font DPI.')
+              print('  --inxi-timeout=<seconds>    Stop gathering advanced system information after this long.')
+              print('  --featured-seed=<number>    Pick the same featured apps on every visit to the Boutique.')
               print('')
               exit()
 
@@ -2453,6 +3474,17 @@ class Arguments(object):
               print('[Debug] Forcing the application to think we\'re connected with an internet connection.')
               self.simulate_force_connection = True
 
+          if arg.startswith('--net-check='):
+              host = arg.split('--net-check=')[1]
+              if ':' in host:
+                  host, port = host.rsplit(':', 1)
+                  try:
+                      self.net_check_port = int(port)
+                  except ValueError:
+                      print('[Debug] Invalid port for "--net-check". Using ' + str(self.net_check_port) + '.')
+              self.net_check_host = host
+              print('[Debug] Checking for an internet connection using: ' + host + ':' + str(self.net_check_port))
+
           if arg == '--software-only':
               print('[Welcome] Starting in software selections only mode.')
               self.jump_software_page = True
@@ -2477,6 +3509,19 @@ class Arguments(object):
                   return
               print('[Debug] Overriding font DPI to ' + str(self.font_dpi_override) + '.')
 
+          if arg.startswith('--inxi-timeout='):
+              try:
+                  self.inxi_timeout = int(arg.split('--inxi-timeout=')[1])
+              except:
+                  print('[Debug] Invalid inxi timeout specified. Ignoring.')
+
+          if arg.startswith('--featured-seed='):
+              try:
+                  self.featured_seed = int(arg.split('--featured-seed=')[1])
+                  print('[Debug] Featured apps are picked with seed ' + str(self.featured_seed) + '.')
+              except ValueError:
+                  print('[Debug] Invalid featured apps seed specified. Ignoring.')
+
     def print_verbose(self, feature, text):
         if self.verbose_enabled:
             print('[' + feature + '] ' + text)
@@ -2503,8 +3548,15 @@ if __name__ == "__main__":
     # Process any parameters passed to the program.
     arg = Arguments()
 
+    # Translate into the locale given on the command line instead.
+    if arg.locale:
+        t = load_translations(arg.locale)
+        _ = t.gettext
+
     # Application Initialization
     set_proc_title()
+    aptcache = SharedAptCache()
+    dpkgstatus = DpkgStatus()
     systemstate = SystemState()
     app = WelcomeApp()
     dynamicapps = DynamicApps()
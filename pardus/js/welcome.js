@@ -48,6 +48,29 @@ $(document).ready(function() {
 
 });
 
+// Apply a batch of changes passed from Python. See PageState in hosgeldiniz.py.
+//   ['$', selector, method, args]  = Call a jQuery method on the selector.
+//   ['var', name, value]           = Set a global variable.
+//   ['call', function, args]       = Call a global function.
+function applyPageState(actions) {
+  for (var i = 0; i < actions.length; i++) {
+    var action = actions[i];
+    // One failing action should not stop the rest, as separate scripts would not have.
+    try {
+      if ( action[0] == 'var' ) {
+        window[action[1]] = action[2];
+      } else if ( action[0] == 'call' ) {
+        window[action[1]].apply(window, action[2]);
+      } else {
+        var element = $(action[1]);
+        element[action[2]].apply(element, action[3]);
+      }
+    } catch (err) {
+      console.log('applyPageState: ' + JSON.stringify(action) + ' failed: ' + err);
+    }
+  }
+}
+
 // Smoothly fade between two elements (by ID)
 function smoothFade(from, to) {
   $(from).fadeOut();
@@ -345,10 +368,7 @@ if ( current_page == 'software.html' ) {
           $(next).jAnimateOnce('fadeInDown');
         }, 250);
 
-        // Show all apps again, in case the previous page was filtered.
-        $('.app-entry').fadeIn();
-
-        // Reset filters
+        // Reset filters, in case the previous page was filtered.
         selected_filter = 'none';
         $('.filter-box').val('none');
         applyFilter();
@@ -361,6 +381,10 @@ if ( current_page == 'software.html' ) {
 
     // A category tab is clicked.
     function changeCategoryTab(id,humanText) {
+      if ( $('#app-search').val() ) {
+        $('#app-search').val('');
+        showSearchResults('', []);
+      }
       switchCategory(currentCategory, id, humanText);
       $('#categoryHover').fadeOut()
     }
@@ -395,7 +419,17 @@ if ( current_page == 'software.html' ) {
     });
 
     // Filtering applications by subcategory and/or proprietary software.
+    // Python passes the style rules and subcategory numbers once, then only a class changes.
     selected_filter = 'none';
+    hide_non_free = false;
+    var filter_buckets = {};
+    var filter_class = '';
+
+    function initAppFilter(rules, buckets) {
+      $('#app-filter-rules').remove();
+      $('<style id="app-filter-rules"></style>').text(rules).appendTo('head');
+      filter_buckets = buckets;
+    }
 
     $("select").change(function(){
         selected_filter = $(this).val();
@@ -407,22 +441,89 @@ if ( current_page == 'software.html' ) {
     });
 
     function applyFilter() {
-        window.location.href = 'cmd://filter-apps?' + selected_filter + '?';
+        $('body').removeClass(filter_class);
+        filter_class = '';
+        if ( selected_filter in filter_buckets ) {
+          filter_class = 'app-filter-' + filter_buckets[selected_filter];
+        }
+        $('body').addClass(filter_class).toggleClass('hide-non-free', hide_non_free);
     }
 
     function toggleNonFree() {
-        window.location.href = 'cmd://filter-apps?' + selected_filter + '?toggle';
+        hide_non_free = !hide_non_free;
+        $('#nonFreeCheckBox').toggleClass('fa-square', !hide_non_free).toggleClass('fa-check-square', hide_non_free);
+        applyFilter();
+    }
+
+    // Searching applications. Python adds the search box with translated text, looks up
+    // the words and passes back the matching entries, which are shown under their own
+    // categories while the others are hidden.
+    var search_timer;
+    function initAppSearch(placeholder, no_results_title, no_results_text) {
+      if ( $('#app-search').length ) {
+        return;
+      }
+      $('<input id="app-search" class="search-query" type="search">')
+        .attr('placeholder', placeholder)
+        .appendTo('#navigation-right')
+        .on('input', function() {
+          var query = $(this).val();
+          clearTimeout(search_timer);
+          search_timer = setTimeout(function() {
+            window.location.href = 'cmd://search-apps?' + encodeURIComponent(query);
+          }, 150);
+        });
+      $('<div id="search-no-results" hidden></div>')
+        .append($('<h2></h2>').text(no_results_title), $('<p></p>').text(no_results_text))
+        .insertBefore('#Accessories');
+    }
+
+    function showSearchResults(query, matches) {
+        $('.search-match').removeClass('search-match');
+        var categories = $('.app-entry').parent();
+        categories.removeClass('search-category search-other');
+
+        if ( $.trim(query) == '' ) {
+          $('body').removeClass('searching');
+          $('#search-no-results').hide();
+          return;
+        }
+
+        for (var i = 0; i < matches.length; i++) {
+          $('#' + matches[i]).addClass('search-match');
+        }
+        categories.each(function() {
+          var found = $(this).children('.search-match').length > 0;
+          $(this).addClass(found ? 'search-category' : 'search-other');
+        });
+
+        // Subcategory filters do not apply to search results.
+        if ( selected_filter != 'none' ) {
+          selected_filter = 'none';
+          $('.filter-box').val('none');
+          applyFilter();
+        }
+        $('body').addClass('searching');
+
+        // Cards may also be hidden by the proprietary software filter.
+        $('#search-no-results').toggle($('.app-entry.search-match:visible').length == 0);
+        $('html, body').animate({ scrollTop: 0 }, 0);
     }
 
-    // Featured Grid - Randomly populate and add applications to the grid.
+    // Featured Grid - Add applications to the grid.
     var iconID = 0;
     function addToGrid(icon) {
       iconID++;
       $('#featured-grid').append('<img src="img/applications/'+icon+'.png" id="appIcon' + iconID + '" class="grid-hidden" />');
     }
 
-    // Featured Grid - Set classes to create a semi-circle fade effect.
-    function initGrid() {
+    // Featured Grid - Python passes the randomly picked icons in one go.
+    // Set classes to create a semi-circle fade effect.
+    function initGrid(icons) {
+        for (var i = 0; i < icons.length; i++) {
+          addToGrid(icons[i]);
+        }
+
         $('#appIcon1').addClass('grid-outer');
         $('#appIcon2').addClass('grid-outer');
         $('#appIcon3').addClass('grid-outer');